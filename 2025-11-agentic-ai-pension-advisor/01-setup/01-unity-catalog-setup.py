@@ -127,6 +127,7 @@ CREATE TABLE IF NOT EXISTS {catalog}.{schema}.governance (
 USING delta
 PARTITIONED BY (country)
 COMMENT 'Audit log for all agent queries and tool executions'
+TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true')
 """)
 print(f"✓ Created table: {catalog}.{schema}.governance")
 
@@ -715,7 +716,7 @@ spark_member_profiles.write \
     .option("overwriteSchema", "true") \
     .saveAsTable(table_name)
 
-print(f"✓ Loaded {spark_member_profiles.count()} member profiles")
+print(f"✓ Loaded {len(member_profiles_df)} member profiles")
 
 # COMMAND ----------
 
@@ -7,7 +7,7 @@
 # MAGIC This notebook demonstrates **Production Monitoring** capabilities:
 # MAGIC
 # MAGIC **1. MLflow Tracing (Already Enabled)**
-# MAGIC - Automatic tracing of agent execution via `@mlflow.trace` decorator
+# MAGIC - Automatic tracing of agent execution via a sampled MLflow span around `agent_query`
 # MAGIC - Captures all LLM calls, tool executions, and validation steps
 # MAGIC - Visual trace viewer in MLflow UI
 # MAGIC - No additional setup required
@@ -71,14 +71,17 @@ repo_root = os.path.abspath(os.path.join(os.getcwd(), ".."))
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
+# Production samples traces (production_monitoring.tracing.sample_rate); trace every demo query
+os.environ.setdefault('MLFLOW_TRACE_SAMPLE_RATE', '1.0')
+
 from src.agent_processor import agent_query
 from src.config import MLFLOW_PROD_EXPERIMENT_PATH
 import mlflow
 
-# Set experiment for tracing
-mlflow.set_experiment(MLFLOW_PROD_EXPERIMENT_PATH)
+# Set experiment for tracing (and keep its ID so later searches skip name resolution)
+EXP_ID = mlflow.set_experiment(MLFLOW_PROD_EXPERIMENT_PATH).experiment_id
 
-print("✅ Tracing enabled via @mlflow.trace decorator")
+print("✅ Tracing enabled (sampled span around agent_query)")
 print(f"   Experiment: {MLFLOW_PROD_EXPERIMENT_PATH}")
 
 # COMMAND ----------
@@ -309,7 +312,7 @@ client = mlflow.MlflowClient()
 
 # Get recent runs with traces
 recent_runs = client.search_runs(
-    experiment_ids=[mlflow.get_experiment_by_name(MLFLOW_PROD_EXPERIMENT_PATH).experiment_id],
+    experiment_ids=[EXP_ID],
     filter_string=f"attributes.start_time >= {int((datetime.now() - timedelta(days=1)).timestamp() * 1000)}",
     max_results=100,
     order_by=["start_time DESC"]
@@ -340,7 +343,7 @@ if recent_runs:
 # MAGIC ### What We Covered
 # MAGIC
 # MAGIC **Part 1: MLflow Tracing** ✅
-# MAGIC - Enabled via `@mlflow.trace` decorator
+# MAGIC - Sampled MLflow span around `agent_query` (`MLFLOW_TRACE_SAMPLE_RATE`)
 # MAGIC - Automatic capture of all agent execution
 # MAGIC - Visual trace viewer in MLflow UI
 # MAGIC - No additional code changes needed
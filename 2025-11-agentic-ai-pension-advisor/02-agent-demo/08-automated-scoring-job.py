@@ -46,9 +46,9 @@
 
 import sys
 import os
-from datetime import datetime, timedelta
+import functools
+from datetime import datetime
 from typing import List, Dict, Any
-import json
 
 # Add project root to path
 repo_root = os.path.abspath(os.path.join(os.getcwd(), ".."))
@@ -60,7 +60,7 @@ from src.config import MLFLOW_PROD_EXPERIMENT_PATH, UNITY_CATALOG, UNITY_SCHEMA
 from src.shared.logging_config import get_logger
 import mlflow
 from pyspark.sql import SparkSession
-from pyspark.sql.functions import col, current_timestamp, lit, expr, date_trunc
+from pyspark.sql.functions import col, current_timestamp, lit, expr, date_trunc, get_json_object
 from databricks.sdk import WorkspaceClient
 
 logger = get_logger(__name__)
@@ -85,6 +85,11 @@ SAMPLING_RATE = float(dbutils.widgets.get("sampling_rate")) if "sampling_rate" i
 LOOKBACK_HOURS = int(dbutils.widgets.get("lookback_hours")) if "lookback_hours" in [w.name for w in dbutils.widgets.getAll()] else 6
 SCORING_TABLE = f"{UNITY_CATALOG}.{UNITY_SCHEMA}.scoring_results"
 
+# Single timestamp for the whole job run - every scored row shares it and the
+# lookback window is derived from it, so both stay in lockstep
+JOB_TS = datetime.now()
+JOB_TS_MS = int(JOB_TS.timestamp() * 1000)
+
 print(f"Configuration:")
 print(f"  Sampling Rate: {SAMPLING_RATE * 100}%")
 print(f"  Lookback Hours: {LOOKBACK_HOURS}")
@@ -111,9 +116,11 @@ CREATE TABLE IF NOT EXISTS {SCORING_TABLE} (
   passed_count INT COMMENT 'Number of scorers that passed',
   total_count INT COMMENT 'Total number of scorers run',
   verdict STRING COMMENT 'Overall verdict (PASS, FAIL, ERROR)',
-  individual_scores STRING COMMENT 'JSON string with individual scorer results'
+  individual_scores MAP<STRING, STRUCT<score: DOUBLE, passed: BOOLEAN>> COMMENT 'Per-scorer score and pass flag, keyed by scorer name',
+  error_message STRING COMMENT 'Scoring error text for ERROR verdicts'
 )
 USING DELTA
+CLUSTER BY (country, scoring_timestamp)
 COMMENT 'Automated quality scoring results for production queries'
 TBLPROPERTIES (
   'delta.enableChangeDataFeed' = 'true',
@@ -122,6 +129,25 @@ TBLPROPERTIES (
 )
 """)
 
+# CREATE TABLE IF NOT EXISTS leaves older tables alone: migrate tables that still store
+# individual_scores as a JSON string (errors as {"error": ...}), or lack error_message
+INDIVIDUAL_SCORES_TYPE = "MAP<STRING, STRUCT<score: DOUBLE, passed: BOOLEAN>>"
+existing_schema = spark.table(SCORING_TABLE).schema
+if existing_schema["individual_scores"].dataType.typeName() == "string":
+    print(f"⚠️  Migrating {SCORING_TABLE}.individual_scores from JSON STRING to {INDIVIDUAL_SCORES_TYPE}")
+    legacy_df = spark.table(SCORING_TABLE)
+    migrated_df = (
+        legacy_df
+        .withColumn("error_message", get_json_object(col("individual_scores"), "$.error"))
+        .withColumn(
+            "individual_scores",
+            expr(f"CASE WHEN verdict = 'ERROR' THEN NULL ELSE from_json(individual_scores, '{INDIVIDUAL_SCORES_TYPE}') END")
+        )
+    )
+    migrated_df.write.format("delta").mode("overwrite").option("overwriteSchema", "true").saveAsTable(SCORING_TABLE)
+elif "error_message" not in existing_schema.fieldNames():
+    spark.sql(f"ALTER TABLE {SCORING_TABLE} ADD COLUMNS (error_message STRING COMMENT 'Scoring error text for ERROR verdicts')")
+
 # Grant SELECT permission to account users for observability dashboards
 spark.sql(f"GRANT SELECT ON TABLE {SCORING_TABLE} TO `account users`")
 
@@ -142,17 +168,23 @@ print(f"✅ Permissions granted: SELECT and MODIFY to account users")
 client = mlflow.MlflowClient()
 
 # Calculate timestamp filter (last N hours)
-lookback_timestamp = int((datetime.now() - timedelta(hours=LOOKBACK_HOURS)).timestamp() * 1000)
+lookback_timestamp = JOB_TS_MS - LOOKBACK_HOURS * 3600 * 1000
+
+@functools.lru_cache(maxsize=None)
+def _experiment_id(path):
+    """Resolve an experiment path to its ID once per notebook session"""
+    experiment = mlflow.get_experiment_by_name(path)
+    return experiment.experiment_id if experiment else None
 
 # Get experiment
-experiment = mlflow.get_experiment_by_name(MLFLOW_PROD_EXPERIMENT_PATH)
-if not experiment:
+experiment_id = _experiment_id(MLFLOW_PROD_EXPERIMENT_PATH)
+if not experiment_id:
     print(f"⚠️ Experiment not found: {MLFLOW_PROD_EXPERIMENT_PATH}")
     dbutils.notebook.exit("No experiment found")
 
 # Search for recent runs
 recent_runs = client.search_runs(
-    experiment_ids=[experiment.experiment_id],
+    experiment_ids=[experiment_id],
     filter_string=f"attributes.start_time >= {lookback_timestamp}",
     max_results=1000,
     order_by=["start_time DESC"]
@@ -169,6 +201,26 @@ print(f"📊 Found {len(recent_runs)} runs in last {LOOKBACK_HOURS} hours")
 
 import random
 
+def read_text_artifact(run, artifact_name):
+    """
+    Read a text artifact for a run.
+
+    Artifacts stored on DBFS are read in place through the /dbfs FUSE mount,
+    skipping the REST download and local temp copy. Any other URI scheme (or a
+    failed direct read) falls back to MlflowClient.download_artifacts.
+    """
+    artifact_uri = run.info.artifact_uri
+    if artifact_uri.startswith("dbfs:/"):
+        try:
+            with open(f"/dbfs/{artifact_uri.removeprefix('dbfs:/')}/{artifact_name}", 'r') as f:
+                return f.read()
+        except OSError:
+            pass
+
+    local_path = client.download_artifacts(run.info.run_id, artifact_name)
+    with open(local_path, 'r') as f:
+        return f.read()
+
 # Extract query data from runs
 queries_to_score = []
 for run in recent_runs:
@@ -177,24 +229,16 @@ for run in recent_runs:
         user_id = run.data.params.get('user_id', 'unknown')
         country = run.data.params.get('country', 'AU')
 
-        # Get query and response from artifacts (they are logged as text files)
-        # Download artifacts to read the content
-        artifact_uri = run.info.artifact_uri
-
-        # Read query and response from artifacts
+        # Read query and response from artifacts (they are logged as text files)
         query_text = ''
         response_text = ''
         try:
-            query_path = client.download_artifacts(run.info.run_id, "query.txt")
-            with open(query_path, 'r') as f:
-                query_text = f.read()
+            query_text = read_text_artifact(run, "query.txt")
         except Exception as e:
             print(f"  ⚠️ Could not read query.txt for run {run.info.run_id[:8]}: {e}")
 
         try:
-            response_path = client.download_artifacts(run.info.run_id, "response.txt")
-            with open(response_path, 'r') as f:
-                response_text = f.read()
+            response_text = read_text_artifact(run, "response.txt")
         except Exception as e:
             print(f"  ⚠️ Could not read response.txt for run {run.info.run_id[:8]}: {e}")
 
@@ -236,9 +280,11 @@ print(f"🎯 Sampled {len(sampled_queries)} queries ({SAMPLING_RATE * 100}% of t
 
 # Get all available scorers
 scorers = get_all_scorers()
-print(f"📊 Running {len(scorers)} scorers:")
-for scorer in scorers:
-    print(f"  - {scorer.name}")
+# Combined scorers (e.g. the LLM judge) report several dimensions from one call
+scorer_names = [name for scorer in scorers for name in getattr(scorer, 'scorer_names', (scorer.name,))]
+print(f"📊 Running {len(scorer_names)} scorers:")
+for name in scorer_names:
+    print(f"  - {name}")
 
 # Run scorers on sampled queries
 scoring_results = []
@@ -263,13 +309,17 @@ for idx, query_data in enumerate(sampled_queries):
             'user_id': query_data['user_id'],
             'country': query_data['country'],
             'query_timestamp': query_data['timestamp'],
-            'scoring_timestamp': datetime.now(),
+            'scoring_timestamp': JOB_TS,
             'overall_score': result['overall_score'],
             'pass_rate': result['pass_rate'],
             'passed_count': result['passed_count'],
             'total_count': result['total_count'],
             'verdict': result['verdict'],
-            'individual_scores': json.dumps(result['individual_scores'])
+            'individual_scores': {
+                name: {'score': float(r['score']), 'passed': bool(r['passed'])}
+                for name, r in result['individual_scores'].items()
+            },
+            'error_message': None
         })
 
         print(f"  Overall Score: {result['overall_score']:.2f} ({result['verdict']})")
@@ -281,13 +331,14 @@ for idx, query_data in enumerate(sampled_queries):
             'user_id': query_data['user_id'],
             'country': query_data['country'],
             'query_timestamp': query_data['timestamp'],
-            'scoring_timestamp': datetime.now(),
+            'scoring_timestamp': JOB_TS,
             'overall_score': 0.0,
             'pass_rate': 0.0,
             'passed_count': 0,
             'total_count': 0,
             'verdict': 'ERROR',
-            'individual_scores': json.dumps({'error': str(e)})
+            'individual_scores': None,
+            'error_message': str(e)
         })
 
 print(f"\n✅ Scoring complete: {len(scoring_results)} results")
@@ -300,7 +351,7 @@ print(f"\n✅ Scoring complete: {len(scoring_results)} results")
 # COMMAND ----------
 
 # Create DataFrame from results
-from pyspark.sql.types import StructType, StructField, StringType, DoubleType, IntegerType, TimestampType
+from pyspark.sql.types import StructType, StructField, StringType, DoubleType, IntegerType, TimestampType, BooleanType, MapType
 
 schema = StructType([
     StructField("run_id", StringType(), False),
@@ -313,19 +364,34 @@ schema = StructType([
     StructField("passed_count", IntegerType(), True),
     StructField("total_count", IntegerType(), True),
     StructField("verdict", StringType(), True),
-    StructField("individual_scores", StringType(), True)
+    StructField("individual_scores", MapType(StringType(), StructType([
+        StructField("score", DoubleType(), True),
+        StructField("passed", BooleanType(), True)
+    ])), True),
+    StructField("error_message", StringType(), True)
 ])
 
 results_df = spark.createDataFrame(scoring_results, schema)
 
-# Write to Delta table (append mode)
-results_df.write \
-    .format("delta") \
-    .mode("append") \
-    .option("mergeSchema", "true") \
-    .saveAsTable(SCORING_TABLE)
-
-print(f"✅ Stored {results_df.count()} scoring results in {SCORING_TABLE}")
+# Upsert on run_id so retries and overlapping lookback windows don't double-count runs
+# A batch is at most a few dozen rows: keep it in one partition and skip the optimized-write
+# shuffle and auto-compaction for this commit (the session conf overrides the table properties)
+results_df.coalesce(1).createOrReplaceTempView("scoring_results_src")
+spark.conf.set("spark.databricks.delta.optimizeWrite.enabled", "false")
+spark.conf.set("spark.databricks.delta.autoCompact.enabled", "false")
+try:
+    spark.sql(f"""
+    MERGE INTO {SCORING_TABLE} t
+    USING scoring_results_src s
+    ON t.run_id = s.run_id
+    WHEN MATCHED THEN UPDATE SET *
+    WHEN NOT MATCHED THEN INSERT *
+    """)
+finally:
+    spark.conf.unset("spark.databricks.delta.optimizeWrite.enabled")
+    spark.conf.unset("spark.databricks.delta.autoCompact.enabled")
+
+print(f"✅ Stored {len(scoring_results)} scoring results in {SCORING_TABLE}")
 
 # COMMAND ----------
 
@@ -417,7 +483,7 @@ else:
 # MAGIC 1. ✅ Queried production traces from MLflow
 # MAGIC 2. ✅ Sampled queries based on configured rate
 # MAGIC 3. ✅ Ran 5 automated scorers on each query
-# MAGIC 4. ✅ Stored results in Delta table
+# MAGIC 4. ✅ Merged results into Delta table (idempotent on run_id)
 # MAGIC 5. ✅ Generated summary statistics
 # MAGIC 6. ✅ Checked for quality alerts
 # MAGIC
@@ -30,7 +30,9 @@ repo_root = os.path.abspath(
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
-from src.config import MLFLOW_PROD_EXPERIMENT_PATH
+from src.config import MLFLOW_PROD_EXPERIMENT_PATH, UNITY_CATALOG, UNITY_SCHEMA
+from datetime import datetime
+import functools
 import mlflow
 import pandas as pd
 
@@ -46,14 +48,18 @@ print(f"✓ Tracking URI: databricks")
 
 # Set experiment
 mlflow.set_tracking_uri("databricks")
-mlflow.set_experiment(MLFLOW_PROD_EXPERIMENT_PATH)
+# set_experiment already resolves the path, so keep its ID for every search below
+EXP_ID = mlflow.set_experiment(MLFLOW_PROD_EXPERIMENT_PATH).experiment_id
 
 print(f"Experiment path: {MLFLOW_PROD_EXPERIMENT_PATH}")
 
 # Get recent runs
+# Use Run objects and pull only the displayed fields, rather than flattening
+# every param/metric/tag into a wide pandas frame
 try:
-    runs = mlflow.search_runs(
-        experiment_names=[MLFLOW_PROD_EXPERIMENT_PATH],
+    client = mlflow.MlflowClient()
+    runs = client.search_runs(
+        experiment_ids=[EXP_ID],
         max_results=10,
         order_by=["start_time DESC"]
     )
@@ -61,13 +67,22 @@ try:
     if len(runs) > 0:
         print(f"\nFound {len(runs)} recent runs")
 
-        # Select relevant columns
-        display_cols = []
-        for col in ['run_id', 'start_time', 'status', 'metrics.total.cost_usd', 'metrics.total.duration_sec', 'params.country', 'params.user_id']:
-            if col in runs.columns:
-                display_cols.append(col)
-
-        display(runs[display_cols] if display_cols else runs.head())
+        rows = [
+            (
+                r.info.run_id,
+                pd.to_datetime(r.info.start_time, unit="ms"),
+                r.info.status,
+                r.data.metrics.get("total.cost_usd"),
+                r.data.metrics.get("total.duration_sec"),
+                r.data.params.get("country"),
+                r.data.params.get("user_id")
+            )
+            for r in runs
+        ]
+        display(pd.DataFrame(rows, columns=[
+            'run_id', 'start_time', 'status', 'metrics.total.cost_usd',
+            'metrics.total.duration_sec', 'params.country', 'params.user_id'
+        ]))
     else:
         print("\nNo runs found yet. Run the agent demo notebooks to generate tracking data.")
 except Exception as e:
@@ -99,12 +114,21 @@ for category, metric_list in metrics.items():
 
 # COMMAND ----------
 
+# Fetch the latest finished runs once; Cost and Performance Analysis both slice this frame
+@functools.lru_cache(maxsize=4)
+def _finished_runs(experiment_id, max_results=50):
+    return mlflow.search_runs(
+        experiment_ids=[experiment_id],
+        filter_string="attributes.status = 'FINISHED'",
+        order_by=["start_time DESC"],
+        max_results=max_results
+    )
+
 # Analyze costs across runs
 try:
-    runs = mlflow.search_runs(
-        experiment_names=[MLFLOW_PROD_EXPERIMENT_PATH],
-        max_results=50
-    )
+    runs = _finished_runs(EXP_ID)
+    if 'metrics.total.cost_usd' in runs.columns:
+        runs = runs[runs['metrics.total.cost_usd'] > 0]
 
     if len(runs) > 0 and 'metrics.total.cost_usd' in runs.columns:
         total_cost = runs['metrics.total.cost_usd'].sum()
@@ -144,12 +168,11 @@ except Exception as e:
 
 # COMMAND ----------
 
-# Analyze latency across runs
+# Analyze latency across runs (reuses the runs fetched for Cost Analysis)
 try:
-    runs = mlflow.search_runs(
-        experiment_names=[MLFLOW_PROD_EXPERIMENT_PATH],
-        max_results=50
-    )
+    runs = _finished_runs(EXP_ID)
+    if 'metrics.total.duration_sec' in runs.columns:
+        runs = runs[runs['metrics.total.duration_sec'] > 0]
 
     if len(runs) > 0 and 'metrics.total.duration_sec' in runs.columns:
         avg_time = runs['metrics.total.duration_sec'].mean()
@@ -182,6 +205,81 @@ except Exception as e:
 
 # COMMAND ----------
 
+# MAGIC %md
+# MAGIC ## Materialize Run Metrics to Delta
+# MAGIC
+# MAGIC Incrementally copies finished runs into a Delta table so dashboards (see `02-observability`)
+# MAGIC can aggregate with Spark SQL instead of paging every run back through the tracking server.
+# MAGIC Only runs that ended after the last synced run are fetched. Schedule this cell as a job to keep the cache fresh.
+
+# COMMAND ----------
+
+RUNS_CACHE_TABLE = f"{UNITY_CATALOG}.{UNITY_SCHEMA}.mlflow_runs_cache"
+RUNS_CACHE_SCHEMA = """
+  run_id STRING,
+  start_time TIMESTAMP,
+  end_time BIGINT,
+  country STRING,
+  user_id STRING,
+  cost_usd DOUBLE,
+  duration_sec DOUBLE,
+  synthesis_cost_usd DOUBLE,
+  validation_cost_usd DOUBLE,
+  classification_cost_usd DOUBLE
+"""
+
+spark.sql(f"""
+CREATE TABLE IF NOT EXISTS {RUNS_CACHE_TABLE} ({RUNS_CACHE_SCHEMA})
+USING DELTA
+COMMENT 'Flattened MLflow run metrics for the production experiment (end_time is epoch ms, used as sync watermark)'
+TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true')
+""")
+
+try:
+    watermark = spark.sql(f"SELECT COALESCE(MAX(end_time), 0) FROM {RUNS_CACHE_TABLE}").first()[0]
+
+    client = mlflow.MlflowClient()
+
+    new_rows = []
+    page_token = None
+    while True:
+        page = client.search_runs(
+            experiment_ids=[EXP_ID],
+            filter_string=f"attributes.status = 'FINISHED' and attributes.end_time > {watermark}",
+            max_results=1000,
+            page_token=page_token
+        )
+        for run in page:
+            run_metrics = run.data.metrics
+            run_params = run.data.params
+            new_rows.append((
+                run.info.run_id,
+                datetime.fromtimestamp(run.info.start_time / 1000),
+                run.info.end_time,
+                run_params.get('country'),
+                run_params.get('user_id'),
+                run_metrics.get('total.cost_usd'),
+                run_metrics.get('total.duration_sec'),
+                run_metrics.get('synthesis.cost_usd'),
+                run_metrics.get('validation.cost_usd'),
+                run_metrics.get('classification.cost_usd')
+            ))
+        page_token = page.token
+        if not page_token:
+            break
+
+    if new_rows:
+        spark.createDataFrame(new_rows, schema=RUNS_CACHE_SCHEMA) \
+            .coalesce(1) \
+            .write.format("delta").option("optimizeWrite", "false") \
+            .mode("append").saveAsTable(RUNS_CACHE_TABLE)
+
+    print(f"✓ Synced {len(new_rows)} new run(s) into {RUNS_CACHE_TABLE}")
+except Exception as e:
+    print(f"Run metrics sync not available: {e}")
+
+# COMMAND ----------
+
 # MAGIC %md
 # MAGIC ## AgentMonitor Class
 # MAGIC
@@ -38,44 +38,109 @@ print(f"  Governance table: {UNITY_CATALOG}.{UNITY_SCHEMA}.governance")
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Query Latency Analysis
+# MAGIC ## Aggregate Governance Metrics
+# MAGIC
+# MAGIC The governance table is read once and cached as the `gov` temp view for this notebook run.
+# MAGIC The sections below all summarize it at different grains. They are computed together with
+# MAGIC `GROUPING SETS` and cached; each section then selects its grain.
 
 # COMMAND ----------
 
-latency_stats = spark.sql(f"""
+from pyspark.sql import functions as F
+
+gov = spark.read.table(f"{UNITY_CATALOG}.{UNITY_SCHEMA}.governance").cache()
+gov.createOrReplaceTempView("gov")
+print(f"✓ Cached {gov.count()} governance rows")
+
+governance_stats = spark.sql("""
+WITH base AS (
+    SELECT
+        country,
+        tool_used,
+        judge_verdict,
+        timestamp,
+        total_time_seconds,
+        validation_attempts,
+        cost
+    FROM gov
+)
 SELECT
+    CASE
+        WHEN GROUPING(tool_used) = 0 THEN 'tool'
+        WHEN GROUPING(judge_verdict) = 0 THEN 'verdict'
+        ELSE 'country'
+    END as grain,
     country,
+    tool_used,
+    judge_verdict,
     COUNT(*) as query_count,
     AVG(total_time_seconds) as avg_latency,
     MIN(total_time_seconds) as min_latency,
     MAX(total_time_seconds) as max_latency,
-    PERCENTILE(total_time_seconds, 0.95) as p95_latency
-FROM {UNITY_CATALOG}.{UNITY_SCHEMA}.governance
-GROUP BY country
-ORDER BY country
-""")
+    percentile_approx(total_time_seconds, 0.95, 10000) as p95_latency,
+    AVG(validation_attempts) as avg_attempts,
+    AVG(cost) as avg_cost,
+    MIN(timestamp) as first_query,
+    MAX(timestamp) as last_query
+FROM base
+GROUP BY GROUPING SETS ((country), (country, tool_used), (country, judge_verdict))
+""").cache()
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Query Latency Analysis
+
+# COMMAND ----------
+
+latency_stats = governance_stats \
+    .where(F.col("grain") == "country") \
+    .select("country", "query_count", "avg_latency", "min_latency", "max_latency", "p95_latency") \
+    .orderBy("country")
 
 display(latency_stats)
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Tool Usage Patterns
+# MAGIC ## Run Cost and Latency by Country
+# MAGIC
+# MAGIC Reads the Delta cache of MLflow run metrics maintained by `01-mlflow-tracking`.
 
 # COMMAND ----------
 
-tool_usage = spark.sql(f"""
+run_metrics = spark.sql(f"""
 SELECT
-    tool_used,
     country,
-    COUNT(*) as usage_count,
-    AVG(total_time_seconds) as avg_time
-FROM {UNITY_CATALOG}.{UNITY_SCHEMA}.governance
-WHERE tool_used IS NOT NULL
-GROUP BY tool_used, country
-ORDER BY usage_count DESC
+    COUNT(*) as run_count,
+    SUM(cost_usd) as total_cost,
+    AVG(cost_usd) as avg_cost,
+    AVG(duration_sec) as avg_latency,
+    percentile_approx(duration_sec, 0.95) as p95_latency
+FROM {UNITY_CATALOG}.{UNITY_SCHEMA}.mlflow_runs_cache
+GROUP BY country
+ORDER BY country
 """)
 
+display(run_metrics)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Tool Usage Patterns
+
+# COMMAND ----------
+
+tool_usage = governance_stats \
+    .where((F.col("grain") == "tool") & F.col("tool_used").isNotNull()) \
+    .select(
+        "tool_used",
+        "country",
+        F.col("query_count").alias("usage_count"),
+        F.col("avg_latency").alias("avg_time")
+    ) \
+    .orderBy(F.desc("usage_count"))
+
 display(tool_usage)
 
 # COMMAND ----------
@@ -85,18 +150,10 @@ display(tool_usage)
 
 # COMMAND ----------
 
-validation_stats = spark.sql(f"""
-SELECT
-    country,
-    judge_verdict,
-    COUNT(*) as query_count,
-    AVG(validation_attempts) as avg_attempts,
-    AVG(total_time_seconds) as avg_latency
-FROM {UNITY_CATALOG}.{UNITY_SCHEMA}.governance
-WHERE judge_verdict IS NOT NULL
-GROUP BY country, judge_verdict
-ORDER BY country, judge_verdict
-""")
+validation_stats = governance_stats \
+    .where((F.col("grain") == "verdict") & F.col("judge_verdict").isNotNull()) \
+    .select("country", "judge_verdict", "query_count", "avg_attempts", "avg_latency") \
+    .orderBy("country", "judge_verdict")
 
 display(validation_stats)
 
@@ -107,18 +164,17 @@ display(validation_stats)
 
 # COMMAND ----------
 
-query_volume = spark.sql(f"""
-SELECT
-    country,
-    COUNT(*) as query_count,
-    AVG(total_time_seconds) as avg_time,
-    AVG(cost) as avg_cost,
-    MIN(timestamp) as first_query,
-    MAX(timestamp) as last_query
-FROM {UNITY_CATALOG}.{UNITY_SCHEMA}.governance
-GROUP BY country
-ORDER BY query_count DESC
-""")
+query_volume = governance_stats \
+    .where(F.col("grain") == "country") \
+    .select(
+        "country",
+        "query_count",
+        F.col("avg_latency").alias("avg_time"),
+        "avg_cost",
+        "first_query",
+        "last_query"
+    ) \
+    .orderBy(F.desc("query_count"))
 
 display(query_volume)
 
@@ -129,7 +185,7 @@ display(query_volume)
 
 # COMMAND ----------
 
-recent_queries = spark.sql(f"""
+recent_queries = spark.sql("""
 SELECT
     timestamp,
     country,
@@ -138,7 +194,7 @@ SELECT
     judge_verdict,
     total_time_seconds,
     cost
-FROM {UNITY_CATALOG}.{UNITY_SCHEMA}.governance
+FROM gov
 ORDER BY timestamp DESC
 LIMIT 20
 """)
@@ -149,19 +205,41 @@ display(recent_queries)
 
 # MAGIC %md
 # MAGIC ## Cost Trends
+# MAGIC
+# MAGIC Daily cost totals are maintained incrementally in `cost_trends_daily` from the governance table's
+# MAGIC Change Data Feed, so each run only aggregates rows logged since the previous run.
 
 # COMMAND ----------
 
+COST_TRENDS_TABLE = f"{UNITY_CATALOG}.{UNITY_SCHEMA}.cost_trends_daily"
+# Stream checkpoints live in a UC volume: governed, and available on serverless and shared clusters
+spark.sql(f"CREATE VOLUME IF NOT EXISTS {UNITY_CATALOG}.{UNITY_SCHEMA}.checkpoints")
+COST_TRENDS_CHECKPOINT = f"/Volumes/{UNITY_CATALOG}/{UNITY_SCHEMA}/checkpoints/cost_trends_daily"
+
+# The audit log is append-only, so only inserts contribute to the totals
+daily_costs = spark.readStream \
+    .format("delta") \
+    .option("readChangeFeed", "true") \
+    .table(f"{UNITY_CATALOG}.{UNITY_SCHEMA}.governance") \
+    .where((F.col("_change_type") == "insert") & F.col("cost").isNotNull()) \
+    .groupBy(F.to_date("timestamp").alias("date"), "country") \
+    .agg(F.count("*").alias("query_count"), F.sum("cost").alias("total_cost"))
+
+daily_costs.writeStream \
+    .outputMode("complete") \
+    .option("checkpointLocation", COST_TRENDS_CHECKPOINT) \
+    .trigger(availableNow=True) \
+    .toTable(COST_TRENDS_TABLE) \
+    .awaitTermination()
+
 cost_trends = spark.sql(f"""
 SELECT
-    DATE(timestamp) as date,
+    date,
     country,
-    COUNT(*) as query_count,
-    SUM(cost) as total_cost,
-    AVG(cost) as avg_cost
-FROM {UNITY_CATALOG}.{UNITY_SCHEMA}.governance
-WHERE cost IS NOT NULL
-GROUP BY DATE(timestamp), country
+    query_count,
+    total_cost,
+    total_cost / query_count as avg_cost
+FROM {COST_TRENDS_TABLE}
 ORDER BY date DESC, country
 LIMIT 50
 """)
@@ -170,5 +248,8 @@ display(cost_trends)
 
 # COMMAND ----------
 
+governance_stats.unpersist()
+spark.catalog.uncacheTable("gov")
+
 print("✅ Observability metrics available")
 print("   Query governance table for detailed agent analytics")
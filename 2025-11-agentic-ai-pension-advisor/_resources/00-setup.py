@@ -46,10 +46,15 @@ functions_schema = FUNCTIONS_SCHEMA
 dbutils.widgets.dropdown("reset_all_data", "false", ["true", "false"], "Reset All Data")
 reset_all_data = dbutils.widgets.get("reset_all_data") == "true"
 
+# Verbose widget (lists schemas and tables at the end of setup)
+dbutils.widgets.dropdown("verbose", "false", ["true", "false"], "Verbose")
+verbose = dbutils.widgets.get("verbose") == "true"
+
 print(f"Catalog: {catalog}")
 print(f"Schema: {schema}")
 print(f"Functions Schema: {functions_schema}")
 print(f"Reset data: {reset_all_data}")
+print(f"Verbose: {verbose}")
 
 # COMMAND ----------
 
@@ -58,23 +63,21 @@ print(f"Reset data: {reset_all_data}")
 
 # COMMAND ----------
 
+from concurrent.futures import ThreadPoolExecutor
+
 # Create catalog if it doesn't exist
 spark.sql(f"CREATE CATALOG IF NOT EXISTS {catalog}")
 print(f"✓ Catalog '{catalog}' ready")
 
-# Use the catalog
-spark.sql(f"USE CATALOG {catalog}")
-
-# Create schemas if they don't exist
-spark.sql(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+# Create schemas if they don't exist (independent metastore calls, so issue them concurrently)
+with ThreadPoolExecutor(max_workers=2) as pool:
+    list(pool.map(spark.sql, [
+        f"CREATE SCHEMA IF NOT EXISTS {catalog}.{schema}",
+        f"CREATE SCHEMA IF NOT EXISTS {catalog}.{functions_schema}"
+    ]))
 print(f"✓ Schema '{schema}' ready")
-
-spark.sql(f"CREATE SCHEMA IF NOT EXISTS {functions_schema}")
 print(f"✓ Schema '{functions_schema}' ready (for UC functions)")
 
-# Use the schema
-spark.sql(f"USE SCHEMA {schema}")
-
 # COMMAND ----------
 
 # MAGIC %md
@@ -98,40 +101,69 @@ print(f"  - Storage path: {cloud_storage_path}")
 # MAGIC %md
 # MAGIC ## Reset Data (Optional)
 # MAGIC
-# MAGIC If reset_all_data is true, drop all tables
+# MAGIC If reset_all_data is true, drop all tables. The schema itself is kept, so UC functions,
+# MAGIC registered models, volumes and grants in it survive the reset.
 
 # COMMAND ----------
 
 if reset_all_data:
     print("⚠️  Resetting all data...")
 
-    # Get list of tables
+    # Get list of tables (not DROP SCHEMA CASCADE: the functions schema may be this same schema)
     tables = spark.sql(f"SHOW TABLES IN {catalog}.{schema}").collect()
+    full_table_names = [f"{catalog}.{schema}.{row.tableName}" for row in tables if not row.isTemporary]
 
-    for table_row in tables:
-        table_name = table_row.tableName
-        full_table_name = f"{catalog}.{schema}.{table_name}"
+    # Independent metastore calls, so issue them concurrently
+    def drop_table(full_table_name):
         print(f"  Dropping {full_table_name}...")
         spark.sql(f"DROP TABLE IF EXISTS {full_table_name}")
 
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(drop_table, full_table_names))
+
     print(f"✓ All tables dropped in {catalog}.{schema}")
 else:
     print("ℹ️  Keeping existing data (reset_all_data=false)")
 
 # COMMAND ----------
 
+# MAGIC %md
+# MAGIC ## Optimize Governance Table
+# MAGIC
+# MAGIC Dashboards filter the governance audit log by country and time range. The table is already
+# MAGIC partitioned by `country`, so Z-ORDER on `timestamp` lets Delta skip files outside the queried window.
+# MAGIC Schedule this cell (or the whole notebook) as a periodic job to keep newly logged rows clustered.
+# MAGIC Change Data Feed is also enabled so downstream dashboards can aggregate only newly logged rows.
+
+# COMMAND ----------
+
+governance_table = f"{catalog}.{schema}.governance"
+
+if spark.catalog.tableExists(governance_table):
+    # Change Data Feed lets 03-monitoring-demo/02-observability aggregate cost trends incrementally
+    spark.sql(f"ALTER TABLE {governance_table} SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true')")
+    spark.sql(f"OPTIMIZE {governance_table} ZORDER BY (timestamp)")
+    print(f"✓ Optimized {governance_table} (ZORDER BY timestamp, Change Data Feed enabled)")
+else:
+    print(f"ℹ️  {governance_table} not created yet - run 01-setup/01-unity-catalog-setup first")
+
+# COMMAND ----------
+
 # MAGIC %md
 # MAGIC ## Verify Setup
 
 # COMMAND ----------
 
-# List schemas in catalog
-print("Schemas in catalog:")
-display(spark.sql(f"SHOW SCHEMAS IN {catalog}"))
+if verbose:
+    # List schemas in catalog
+    print("Schemas in catalog:")
+    display(spark.sql(f"SHOW SCHEMAS IN {catalog}"))
 
-# List tables in schema
-print(f"\nTables in {catalog}.{schema}:")
-display(spark.sql(f"SHOW TABLES IN {catalog}.{schema}"))
+    # List tables in schema
+    print(f"\nTables in {catalog}.{schema}:")
+    display(spark.sql(f"SHOW TABLES IN {catalog}.{schema}"))
+else:
+    print("ℹ️  Skipping schema/table listing (verbose=false)")
 
 # COMMAND ----------
 
@@ -4,14 +4,31 @@ Check the actual table: financial_services.pension_advisory.member_profiles
 """
 
 import os
+import time
 os.environ['DATABRICKS_CONFIG_PROFILE'] = 'e2-demo-west'
 
-from databricks.sdk import WorkspaceClient
+
+def _wait_for_statement(w, statement_id, poll_seconds=0.5):
+    """Poll a submitted statement until it leaves the PENDING/RUNNING states"""
+    from databricks.sdk.service.sql import StatementState
+
+    result = w.statement_execution.get_statement(statement_id)
+    while result.status.state in (StatementState.PENDING, StatementState.RUNNING):
+        time.sleep(poll_seconds)
+        result = w.statement_execution.get_statement(statement_id)
+
+    if result.status.state != StatementState.SUCCEEDED:
+        error = result.status.error.message if result.status.error else result.status.state
+        raise RuntimeError(f"Statement {statement_id} failed: {error}")
+    return result
+
 
 def check_actual_table():
     """Query the actual production table"""
+    # Deferred so importing this script doesn't pay the SDK import cost
+    from src.shared.databricks_client import get_client
 
-    w = WorkspaceClient()
+    w = get_client()
 
     # Hardcode the actual table location
     catalog = "financial_services"
@@ -31,17 +48,37 @@ def check_actual_table():
     LIMIT 20
     """
 
+    query_uk = f"""
+    SELECT
+        member_id,
+        name,
+        age,
+        pension_balance,
+        pension_type,
+        country
+    FROM {catalog}.{schema}.member_profiles
+    WHERE country = 'UK'
+    ORDER BY member_id
+    """
+
     print("=" * 80)
     print(f"Querying: {catalog}.{schema}.member_profiles")
     print("=" * 80)
 
     try:
-        result = w.statement_execution.execute_statement(
-            statement=query,
-            warehouse_id=warehouse_id,
-            catalog=catalog,
-            schema=schema
-        )
+        # Submit both queries without blocking (wait_timeout=0s) so the warehouse
+        # runs them concurrently, then poll each for its result
+        statement_ids = [
+            w.statement_execution.execute_statement(
+                statement=sql,
+                warehouse_id=warehouse_id,
+                catalog=catalog,
+                schema=schema,
+                wait_timeout="0s"
+            ).statement_id
+            for sql in (query, query_uk)
+        ]
+        result, result_uk = (_wait_for_statement(w, statement_id) for statement_id in statement_ids)
 
         if result.result and result.result.data_array:
             print(f"\nFound {len(result.result.data_array)} members:")
@@ -51,26 +88,6 @@ def check_actual_table():
                 print(f"{member_id:10} | {name:25} | Age {age:2} | {balance:12.2f} | {pension_type:15} | {country}")
 
             # Now show just UK members
-            query_uk = f"""
-            SELECT
-                member_id,
-                name,
-                age,
-                pension_balance,
-                pension_type,
-                country
-            FROM {catalog}.{schema}.member_profiles
-            WHERE country = 'UK'
-            ORDER BY member_id
-            """
-
-            result_uk = w.statement_execution.execute_statement(
-                statement=query_uk,
-                warehouse_id=warehouse_id,
-                catalog=catalog,
-                schema=schema
-            )
-
             print("\n" + "=" * 80)
             print("UK Members with Pension Types:")
             print("=" * 80)
@@ -4,78 +4,80 @@ Check UK member profiles and their pension types
 """
 
 import os
-from databricks.sdk import WorkspaceClient
+import sys
 from src.config import SQL_WAREHOUSE_ID, UNITY_CATALOG, UNITY_SCHEMA, MEMBER_PROFILES_TABLE
 
+MEMBER_COLUMNS = ('member_id', 'name', 'age', 'balance', 'pension_type', 'country')
+
+# Row templates are bound once; output is joined and written in one call per block
+format_summary_row = "{member_id:10} | {name:20} | Age {age:2} | {balance:12.2f} | {pension_type:15} | {country}".format_map
+format_uk_member = (
+    "\nMember ID: {member_id}\n"
+    "Name: {name}\n"
+    "Age: {age}\n"
+    "Balance: {balance} GBP\n"
+    "Pension Type: {pension_type}\n"
+    + "-" * 80
+).format_map
+
+
+def _member_fields(row):
+    """Map a data_array row (all strings) onto MEMBER_COLUMNS with numeric age/balance"""
+    fields = dict(zip(MEMBER_COLUMNS, row))
+    fields['age'] = int(fields['age'])
+    fields['balance'] = float(fields['balance'])
+    return fields
+
+
 def check_uk_members():
     """Query UK members and show their pension types"""
+    # Deferred so importing this script doesn't pay the SDK import cost
+    from src.shared.databricks_client import get_client
 
-    w = WorkspaceClient()
-
-    # First, check all members
-    query_all = f"""
-    SELECT
-        member_id,
-        name,
-        age,
-        pension_balance,
-        pension_type,
-        country
-    FROM {UNITY_CATALOG}.{UNITY_SCHEMA}.{MEMBER_PROFILES_TABLE}
-    ORDER BY country, member_id
-    LIMIT 20
-    """
+    w = get_client()
 
-    print("All Members (first 20):")
-    print("=" * 80)
+    # Both listings in one statement, tagged by kind and ordered by a per-kind rank:
+    # the first 20 members overall, then every UK member
+    columns = "member_id, name, age, pension_balance, pension_type, country"
+    table = f"{UNITY_CATALOG}.{UNITY_SCHEMA}.{MEMBER_PROFILES_TABLE}"
+    query = f"""
+    SELECT * FROM (
+        SELECT 'sample' AS kind, ROW_NUMBER() OVER (ORDER BY country, member_id) AS rn, {columns}
+        FROM {table}
+    )
+    WHERE rn <= 20
+    UNION ALL
+    SELECT 'uk' AS kind, ROW_NUMBER() OVER (ORDER BY member_id) AS rn, {columns}
+    FROM {table}
+    WHERE country = 'UK'
+    ORDER BY kind, rn
+    """
 
     result = w.statement_execution.execute_statement(
-        statement=query_all,
+        statement=query,
         warehouse_id=SQL_WAREHOUSE_ID,
         catalog=UNITY_CATALOG,
         schema=UNITY_SCHEMA
     )
 
-    if result.result and result.result.data_array:
-        for row in result.result.data_array:
-            member_id, name, age, balance, pension_type, country = row
-            print(f"{member_id:10} | {name:20} | Age {age:2} | {balance:12.2f} | {pension_type:15} | {country}")
+    rows = result.result.data_array if result.result and result.result.data_array else []
+    sample_rows = [row[2:] for row in rows if row[0] == 'sample']
+    uk_rows = [row[2:] for row in rows if row[0] == 'uk']
 
-    print("\n")
+    print("All Members (first 20):")
+    print("=" * 80)
 
-    query = f"""
-    SELECT
-        member_id,
-        name,
-        age,
-        pension_balance,
-        pension_type,
-        country
-    FROM {UNITY_CATALOG}.{UNITY_SCHEMA}.{MEMBER_PROFILES_TABLE}
-    WHERE country = 'UK'
-    ORDER BY member_id
-    """
+    if sample_rows:
+        sys.stdout.write("\n".join(format_summary_row(_member_fields(row)) for row in sample_rows) + "\n")
+
+    print("\n")
 
     print("=" * 80)
     print("UK Member Profiles")
     print("=" * 80)
 
-    result = w.statement_execution.execute_statement(
-        statement=query,
-        warehouse_id=SQL_WAREHOUSE_ID,
-        catalog=UNITY_CATALOG,
-        schema=UNITY_SCHEMA
-    )
-
-    if result.result and result.result.data_array:
-        for row in result.result.data_array:
-            member_id, name, age, balance, pension_type, country = row
-            print(f"\nMember ID: {member_id}")
-            print(f"Name: {name}")
-            print(f"Age: {age}")
-            print(f"Balance: {balance} GBP")
-            print(f"Pension Type: {pension_type}")
-            print("-" * 80)
+    if uk_rows:
+        sys.stdout.write("\n".join(format_uk_member(_member_fields(row)) for row in uk_rows) + "\n")
     else:
         print("No UK members found")
 
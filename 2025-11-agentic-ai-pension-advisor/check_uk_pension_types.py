@@ -3,41 +3,30 @@
 Check UK members and their actual pension configuration
 """
 
-from databricks.sdk import WorkspaceClient
+import sys
+
+# Bound once; each result block is joined and written in a single call
+format_uk_member = (
+    "\n{member_id}: {name}\n"
+    "  Age: {age}\n"
+    "  Balance: {balance} GBP\n"
+    "  Account Based Pension: {abp}\n"
+    "  Employment: {emp_status}"
+).format_map
+UK_MEMBER_COLUMNS = ('member_id', 'name', 'age', 'balance', 'abp', 'emp_status', 'country')
+
 
 def check_uk_members():
     """Query UK members with all relevant columns"""
+    # Deferred so importing this script doesn't pay the SDK import cost
+    from src.shared.databricks_client import get_client
 
-    w = WorkspaceClient()
+    w = get_client()
 
     catalog = "financial_services"
     schema = "pension_advisory"
     warehouse_id = "4b9b953939869799"
 
-    # First check what columns exist
-    query_describe = f"DESCRIBE {catalog}.{schema}.member_profiles"
-
-    print("=" * 80)
-    print("Table Schema:")
-    print("=" * 80)
-
-    result = w.statement_execution.execute_statement(
-        statement=query_describe,
-        warehouse_id=warehouse_id,
-        catalog=catalog,
-        schema=schema
-    )
-
-    if result.result and result.result.data_array:
-        for row in result.result.data_array:
-            col_name = row[0]
-            col_type = row[1]
-            print(f"{col_name:30} {col_type}")
-
-    print("\n" + "=" * 80)
-    print("UK Members:")
-    print("=" * 80)
-
     # Query UK members with pension-related fields
     query = f"""
     SELECT
@@ -60,14 +49,22 @@ def check_uk_members():
         schema=schema
     )
 
+    # Column names and types come back in the result manifest, so no separate DESCRIBE is needed
+    print("=" * 80)
+    print("Table Schema:")
+    print("=" * 80)
+
+    if result.manifest and result.manifest.schema:
+        sys.stdout.write("\n".join(f"{c.name:30} {c.type_text}" for c in result.manifest.schema.columns) + "\n")
+
+    print("\n" + "=" * 80)
+    print("UK Members:")
+    print("=" * 80)
+
     if result.result and result.result.data_array:
-        for row in result.result.data_array:
-            member_id, name, age, balance, abp, emp_status, country = row
-            print(f"\n{member_id}: {name}")
-            print(f"  Age: {age}")
-            print(f"  Balance: {balance} GBP")
-            print(f"  Account Based Pension: {abp}")
-            print(f"  Employment: {emp_status}")
+        sys.stdout.write("\n".join(
+            format_uk_member(dict(zip(UK_MEMBER_COLUMNS, row))) for row in result.result.data_array
+        ) + "\n")
     else:
         print("No UK members found")
 
@@ -3,39 +3,89 @@
 List all available catalogs and schemas to find member data
 """
 
-from databricks.sdk import WorkspaceClient
+import hashlib
+import json
+import pathlib
+import time
+
+from src.config import SQL_WAREHOUSE_ID
+
+# Metadata rarely changes between dev re-runs; reuse the last listing for a few minutes
+CACHE_DIR = pathlib.Path("~/.cache/pension-advisor").expanduser()
+CACHE_TTL_SECONDS = 300
+
+# Every visible schema, with any member/profile tables it contains, in one metadata scan
+# instead of a REST call per catalog and per schema
+QUERY = """
+SELECT
+    s.catalog_name,
+    s.schema_name,
+    t.table_name
+FROM system.information_schema.schemata s
+LEFT JOIN system.information_schema.tables t
+    ON t.table_catalog = s.catalog_name
+    AND t.table_schema = s.schema_name
+    AND (lower(t.table_name) LIKE '%member%' OR lower(t.table_name) LIKE '%profile%')
+ORDER BY s.catalog_name, s.schema_name, t.table_name
+"""
+
+
+def _fetch_rows(w):
+    """Run QUERY and return all (catalog, schema, table) rows"""
+    result = w.statement_execution.execute_statement(
+        statement=QUERY,
+        warehouse_id=SQL_WAREHOUSE_ID,
+        wait_timeout="30s"
+    )
+
+    rows = list(result.result.data_array or []) if result.result else []
+    # Large workspaces can spill into additional result chunks
+    next_chunk = result.result.next_chunk_index if result.result else None
+    while next_chunk is not None:
+        chunk = w.statement_execution.get_statement_result_chunk_n(result.statement_id, next_chunk)
+        rows.extend(chunk.data_array or [])
+        next_chunk = chunk.next_chunk_index
+    return rows
+
+
+def _cached_rows(w):
+    """Return the listing from the per-workspace cache file, refreshing it once stale"""
+    workspace_key = hashlib.sha256(w.config.host.encode()).hexdigest()[:16]
+    cache_file = CACHE_DIR / f"catalogs-{workspace_key}.json"
+
+    if cache_file.exists() and time.time() - cache_file.stat().st_mtime < CACHE_TTL_SECONDS:
+        return json.loads(cache_file.read_text())
+
+    rows = _fetch_rows(w)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps(rows))
+    return rows
+
 
 def list_catalogs():
     """List all catalogs and their schemas"""
+    # Deferred so importing this script doesn't pay the SDK import cost
+    from src.shared.databricks_client import get_client
 
-    w = WorkspaceClient()
+    w = get_client()
 
     print("=" * 80)
     print("Available Catalogs and Schemas:")
     print("=" * 80)
 
     try:
-        catalogs = w.catalogs.list()
-
-        for catalog in catalogs:
-            print(f"\nCatalog: {catalog.name}")
-
-            try:
-                schemas = w.schemas.list(catalog_name=catalog.name)
-                for schema in schemas:
-                    print(f"  └─ Schema: {schema.name}")
-
-                    # Try to find member_profiles table
-                    try:
-                        tables = w.tables.list(catalog_name=catalog.name, schema_name=schema.name)
-                        for table in tables:
-                            if 'member' in table.name.lower() or 'profile' in table.name.lower():
-                                print(f"      └─ Table: {table.name} ⭐")
-                    except:
-                        pass
-
-            except Exception as e:
-                print(f"  └─ (Cannot list schemas: {e})")
+        rows = _cached_rows(w)
+
+        current_catalog = current_schema = None
+        for catalog_name, schema_name, table_name in rows:
+            if catalog_name != current_catalog:
+                print(f"\nCatalog: {catalog_name}")
+                current_catalog, current_schema = catalog_name, None
+            if schema_name != current_schema:
+                print(f"  └─ Schema: {schema_name}")
+                current_schema = schema_name
+            if table_name:
+                print(f"      └─ Table: {table_name} ⭐")
 
     except Exception as e:
         print(f"Error listing catalogs: {e}")
@@ -6,18 +6,26 @@ Simple count query to verify data exists
 import os
 os.environ['DATABRICKS_CONFIG_PROFILE'] = 'e2-demo-west'
 
-from databricks.sdk import WorkspaceClient
 
 def simple_count():
     """Simple count query"""
+    # Deferred so importing this script doesn't pay the SDK import cost
+    from src.shared.databricks_client import get_client
 
-    w = WorkspaceClient()
+    w = get_client()
 
     catalog = "financial_services"
     schema = "pension_advisory"
     warehouse_id = "75fd8278393d07eb"
 
-    query = f"SELECT COUNT(*) as count FROM {catalog}.{schema}.member_profiles"
+    # Total and per-country counts in one statement
+    query = f"""SELECT
+    COUNT(*) AS total,
+    COUNT_IF(country = 'AU') AS au,
+    COUNT_IF(country = 'US') AS us,
+    COUNT_IF(country = 'UK') AS uk,
+    COUNT_IF(country = 'IN') AS in_
+FROM {catalog}.{schema}.member_profiles"""
 
     print(f"Executing: {query}")
     print(f"Warehouse: {warehouse_id}")
@@ -38,8 +46,9 @@ def simple_count():
         if result.result:
             print(f"Data array: {result.result.data_array}")
             if result.result.data_array:
-                count = result.result.data_array[0][0]
-                print(f"\nTotal rows in member_profiles: {count}")
+                total, au, us, uk, in_ = result.result.data_array[0]
+                print(f"\nTotal rows in member_profiles: {total}")
+                print(f"  AU: {au} | US: {us} | UK: {uk} | IN: {in_}")
 
     except Exception as e:
         print(f"Error: {e}")
@@ -8,16 +8,23 @@
 
 from src.agent import SuperAdvisorAgent
 from src.agents.orchestrator import AgentOrchestrator
-from src.utils.audit import log_query_event, _escape_sql
+from src.utils.audit import log_query_event
 from src.utils.progress import initialize_progress_tracker, reset_progress_tracker, mark_phase_running, mark_phase_complete, mark_phase_error
 from src.observability import create_observability
-import traceback, uuid, time, threading
+from src.ai_guardrails import validate_input, validate_output
+import traceback, uuid, time, threading, random, queue, atexit, functools, logging
+from concurrent.futures import ThreadPoolExecutor, wait
 import mlflow
 import mlflow.tracing  # Phase 4: Production monitoring with traces
-import json
-from datetime import datetime
-from databricks.sdk import WorkspaceClient
-from src.config import UNITY_CATALOG, SQL_WAREHOUSE_ID, MLFLOW_PROD_EXPERIMENT_PATH, get_governance_table_path
+import orjson
+from dataclasses import dataclass
+from typing import Any, Optional
+from src.config import (
+    UNITY_CATALOG, SQL_WAREHOUSE_ID, MLFLOW_PROD_EXPERIMENT_PATH, MLFLOW_TRACE_SAMPLE_RATE,
+    AI_GUARDRAILS_ENABLED, AI_GUARDRAILS_CONFIG, get_governance_table_path
+)
+from src.shared.databricks_client import get_client
+from databricks.sdk.service.sql import StatementParameterListItem
 
 # ✅ CORRECT TABLE PATH
 from src.shared.logging_config import get_logger
@@ -26,178 +33,467 @@ logger = get_logger(__name__)
 
 GOVERNANCE_TABLE = get_governance_table_path()
 
+
+def _json_dumps(obj):
+    """Serialize to a JSON str with orjson (C encoder; columns are bound as STRING)
+
+    OPT_NON_STR_KEYS keeps json.dumps' tolerance for int/float/bool dict keys.
+    """
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Citations stored per governance row: the row is an audit record, not the citation source
+MAX_GOVERNANCE_CITATIONS = 50
+MAX_CITATION_FIELD_CHARS = 500
+
+
+def _compact_citations(citations):
+    """Cap the citation count and truncate long text fields (e.g. description) for the audit row"""
+    if not citations:
+        return []
+    return [
+        {
+            key: value[:MAX_CITATION_FIELD_CHARS] if isinstance(value, str) else value
+            for key, value in citation.items()
+        } if isinstance(citation, dict) else citation
+        for citation in citations[:MAX_GOVERNANCE_CITATIONS]
+    ]
+
+
+# Governance table columns (in table order) and the SQL type each parameter is bound as
+GOVERNANCE_COLUMNS = (
+    ('event_id', 'STRING'),
+    ('timestamp', 'TIMESTAMP'),
+    ('user_id', 'STRING'),
+    ('session_id', 'STRING'),
+    ('country', 'STRING'),
+    ('query_string', 'STRING'),
+    ('agent_response', 'STRING'),
+    ('result_preview', 'STRING'),
+    ('cost', 'DOUBLE'),
+    ('citations', 'STRING'),
+    ('tool_used', 'STRING'),
+    ('judge_response', 'STRING'),
+    ('judge_verdict', 'STRING'),
+    ('judge_confidence', 'DOUBLE'),
+    ('error_info', 'STRING'),
+    ('validation_mode', 'STRING'),
+    ('validation_attempts', 'BIGINT'),
+    ('total_time_seconds', 'DOUBLE'),
+)
+
+
+@dataclass(slots=True)
+class GovernanceRow:
+    """One governance audit row, as queued for the batcher (fields match GOVERNANCE_COLUMNS)"""
+    event_id: str
+    timestamp: str
+    user_id: str
+    session_id: str
+    country: str
+    query_string: str
+    agent_response: str
+    result_preview: str
+    cost: float
+    citations: Any  # list, serialized to JSON by the batcher
+    tool_used: str
+    judge_response: Any  # dict, serialized to JSON by the batcher
+    judge_verdict: str
+    judge_confidence: float
+    error_info: Any  # str, or the cost-metadata dict serialized to JSON by the batcher
+    validation_mode: str
+    validation_attempts: int
+    total_time_seconds: float
+
+
+class _GovernanceBatcher:
+    """
+    Queues governance rows and writes them as multi-row parameterized INSERTs.
+
+    A background thread flushes whatever has accumulated every FLUSH_INTERVAL_S
+    (or as soon as MAX_ROWS_PER_STATEMENT rows are waiting), so N queries cost one
+    warehouse statement instead of N. At interpreter exit close() sends a stop
+    sentinel, waits for the thread to finish its current batch, then flushes
+    anything left.
+    """
+
+    FLUSH_INTERVAL_S = 0.5
+    # Statement Execution API allows at most 256 parameters per statement
+    MAX_ROWS_PER_STATEMENT = 256 // len(GOVERNANCE_COLUMNS)
+    CLOSE_TIMEOUT_S = 60
+    _STOP = object()
+
+    def __init__(self, table, warehouse_id):
+        self.table = table
+        self.warehouse_id = warehouse_id
+        self._queue = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, row):
+        """Queue one GovernanceRow"""
+        self._queue.put(row)
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, daemon=True, name="GovernanceBatcher")
+                    self._thread.start()
+
+    def flush(self):
+        """Write every queued row now and wait for any batch the thread is still writing"""
+        rows = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not self._STOP:
+                rows.append(row)
+        try:
+            for i in range(0, len(rows), self.MAX_ROWS_PER_STATEMENT):
+                self._write(rows[i:i + self.MAX_ROWS_PER_STATEMENT])
+        finally:
+            for _ in range(len(rows)):
+                self._queue.task_done()
+        self._queue.join()
+
+    def close(self):
+        """Stop the background thread after its current batch, then flush (atexit hook)"""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(self._STOP)
+            thread.join(timeout=self.CLOSE_TIMEOUT_S)
+        self.flush()
+
+    def _run(self):
+        while True:
+            # Never let one bad batch end the thread: later rows would stay queued forever
+            rows = []
+            taken = 0
+            stop = False
+            try:
+                row = self._queue.get()
+                taken += 1
+                if row is self._STOP:
+                    return
+                rows.append(row)
+                deadline = time.monotonic() + self.FLUSH_INTERVAL_S
+                while len(rows) < self.MAX_ROWS_PER_STATEMENT:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        row = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    taken += 1
+                    if row is self._STOP:
+                        stop = True
+                        break
+                    rows.append(row)
+                self._write(rows)
+            except Exception as e:
+                logger.info(f"⚠️ Governance batcher error: {e}")
+            finally:
+                # Mark taken items done only after the write so flush() can wait on queue.join()
+                for _ in range(taken):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    @staticmethod
+    def _encode_row(row, index):
+        """Placeholder names and bound parameters for one row (raises if a value won't serialize)"""
+        names = []
+        parameters = []
+        for column, sql_type in GOVERNANCE_COLUMNS:
+            name = f"{column}_{index}"
+            value = getattr(row, column)
+            # JSON columns are queued as dicts/lists and serialized here, off the request path
+            if isinstance(value, (dict, list)):
+                value = _json_dumps(value)
+            names.append(f":{name}")
+            parameters.append(StatementParameterListItem(
+                name=name,
+                value=None if value is None else str(value),
+                type=sql_type
+            ))
+        return names, parameters
+
+    def _write(self, rows):
+        # Placeholders are named <column>_<row index>; the statement text only varies with
+        # the number of rows, so full batches share one statement shape
+        placeholders = []
+        parameters = []
+        for row in rows:
+            try:
+                names, row_parameters = self._encode_row(row, len(placeholders))
+            except Exception as e:
+                # Drop only the row that can't be encoded, not the whole batch
+                logger.info(f"⚠️ Governance row dropped ({row.session_id}): {e}")
+                continue
+            placeholders.append(f"({', '.join(names)})")
+            parameters.extend(row_parameters)
+
+        if not placeholders:
+            return
+
+        column_list = ', '.join(column for column, _ in GOVERNANCE_COLUMNS)
+        try:
+            get_client().statement_execution.execute_statement(
+                warehouse_id=self.warehouse_id,
+                statement=f"INSERT INTO {self.table} ({column_list}) VALUES {', '.join(placeholders)}",
+                parameters=parameters,
+                wait_timeout="30s"
+            )
+            logger.info(f"✅ Governance table logged: {len(placeholders)} row(s)")
+        except Exception as e:
+            logger.info(f"⚠️ Governance logging failed for {len(placeholders)} row(s): {e}")
+
+
+_governance_batcher = _GovernanceBatcher(GOVERNANCE_TABLE, SQL_WAREHOUSE_ID)
+atexit.register(_governance_batcher.close)
+
+# Phase 8 logging runs on a small shared pool: bursts queue up instead of spawning a thread
+# per query. Registered after the batcher so (atexit being LIFO) pending Phase 8 tasks finish
+# and queue their rows before the final governance flush.
+_AUDIT_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="Phase8-Logging")
+atexit.register(_AUDIT_EXECUTOR.shutdown, wait=True)
+
+# Futures of Phase 8 tasks not yet finished, for processes where atexit never runs
+_PENDING_PHASE8 = set()
+_PENDING_PHASE8_LOCK = threading.Lock()
+
+
+def _submit_phase8(state):
+    future = _AUDIT_EXECUTOR.submit(_run_phase8, state)
+    with _PENDING_PHASE8_LOCK:
+        _PENDING_PHASE8.add(future)
+
+    def _discard(done):
+        with _PENDING_PHASE8_LOCK:
+            _PENDING_PHASE8.discard(done)
+
+    future.add_done_callback(_discard)
+    return future
+
+
+def wait_for_pending_logging(timeout=None):
+    """
+    Wait for queued Phase 8 tasks, then write every queued governance row.
+
+    Call this where the process may end without running atexit hooks (e.g. Spark
+    Python workers, which exit via os._exit).
+    """
+    with _PENDING_PHASE8_LOCK:
+        pending = list(_PENDING_PHASE8)
+    if pending:
+        wait(pending, timeout=timeout)
+    _governance_batcher.flush()
+
+
 class AuditLogger:
-    """Handles MLflow and UC Governance logging"""
-    
+    """Handles MLflow and UC Governance logging (use get_audit_logger() for the shared instance)"""
+
+    _mlflow_configured = False
+    _mlflow_lock = threading.Lock()
+
     def __init__(self):
-        self.w = WorkspaceClient()
+        self.w = get_client()
         self.warehouse_id = SQL_WAREHOUSE_ID
-        
-        try:
-            mlflow.set_tracking_uri("databricks")
-            mlflow.set_experiment(MLFLOW_PROD_EXPERIMENT_PATH)
-        except Exception as e:
-            logger.info(f"⚠️ MLflow init: {e}")
+        self._configure_mlflow()
+
+    @classmethod
+    def _configure_mlflow(cls):
+        """Point MLflow at the production experiment once per process"""
+        with cls._mlflow_lock:
+            if cls._mlflow_configured:
+                return
+            try:
+                mlflow.set_tracking_uri("databricks")
+                mlflow.set_experiment(MLFLOW_PROD_EXPERIMENT_PATH)
+                cls._mlflow_configured = True
+            except Exception as e:
+                logger.info(f"⚠️ MLflow init: {e}")
     
     # REMOVED: log_to_mlflow() method - DEAD CODE, never called
     # MLflow logging is now handled by Observability class (obs.end_agent_run())
-    # See line 617 in async_phase8_logging() function
+    # Phase 8 (_run_phase8) only adds the metrics summary artifact after the run ends
 
     def log_to_governance_table(self, session_id, user_id, country, query_string,
                                answer, judge_verdict, tools_called, cost, citations,
-                               elapsed, error_info=None, classification_method=None):
-        """Log to UC governance audit table"""
+                               elapsed, error_info=None, classification_method=None,
+                               error_kind='none'):
+        """
+        Queue a row for the UC governance audit table (written in batches).
+
+        error_kind says what error_info holds, so it is stored without probing its content:
+        'cost_metadata' (success path: a dict, stored as JSON as-is), 'traceback' (error path),
+        or 'none'. Anything but cost metadata is prefixed with classification_method.
+        """
         try:
             event_id = str(uuid.uuid4())
-            timestamp = datetime.utcnow().isoformat()
+            # UTC ISO-8601 straight from time.time() (no datetime object, no utcnow() deprecation)
+            now = time.time()
+            timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(now)) + f".{int(now % 1 * 1e6):06d}"
             
-            # ✅ Use escape_sql from utils.audit instead of nested function
-            query_text_escaped = _escape_sql(query_string)
+            # Values are bound as statement parameters, so no SQL escaping is needed
             answer_truncated = answer[:15000] if answer else ""
-            agent_response_escaped = _escape_sql(answer_truncated)
             result_preview = answer_truncated[:500] if answer_truncated else ""
-            result_preview_escaped = _escape_sql(result_preview)
-            judge_response_escaped = _escape_sql(str(judge_verdict.get('reasoning', '')))
             judge_verdict_text = judge_verdict.get('verdict', 'UNKNOWN')
             judge_confidence = judge_verdict.get('confidence', 0.0)  # ✅ Extract confidence
             tool_used = tools_called[0] if tools_called else "none"
-            citations_json = json.dumps(citations) if citations else "[]"
-            citations_escaped = _escape_sql(citations_json)
-            error_text = _escape_sql(error_info) if error_info else ""
+            citations_data = _compact_citations(citations)
             validation_mode = judge_verdict.get('validation_mode', 'llm_judge')
             validation_attempts = judge_verdict.get('attempts', 1)
             
-            # ✅ FIX #6: Don't overwrite error_text if it contains cost_metadata JSON
-            # If error_info already contains JSON (from Fix #6), preserve it
+            # ✅ FIX #6: Don't overwrite cost_metadata JSON (it already carries classification_method)
             # Otherwise, store classification_method (backward compatibility)
-            if classification_method and error_text:
-                # Check if error_text is JSON (from Fix #6)
-                try:
-                    import json as json_check
-                    json_check.loads(error_text)
-                    # It's JSON - DON'T overwrite, keep the cost metadata
-                    pass
-                except:
-                    # Not JSON - old format, prepend classification_method
-                    error_text = f"classification_method={classification_method}|{error_text}"
-            elif classification_method and not error_text:
-                # No error_text, just store classification_method
+            if error_kind == 'cost_metadata' and error_info:
+                error_text = error_info  # dict, serialized by the batcher thread
+            elif classification_method and error_info:
+                error_text = f"classification_method={classification_method}|{error_info}"
+            elif classification_method:
                 error_text = f"classification_method={classification_method}"
+            else:
+                error_text = error_info or ""
             
             # ✅ Store judge_confidence in judge_response JSON if not already present
             # Since schema doesn't have judge_confidence column, we'll store it in judge_response as JSON
-            # Format: JSON string with confidence and reasoning
-            import json as json_lib
+            # Format: JSON string with confidence and reasoning (serialized by the batcher thread)
             judge_response_data = {
                 'reasoning': judge_verdict.get('reasoning', ''),
                 'confidence': judge_confidence
             }
-            judge_response_escaped = _escape_sql(json_lib.dumps(judge_response_data))
-            
-            insert_query = f"""
-            INSERT INTO {GOVERNANCE_TABLE}
-            VALUES (
-                '{event_id}',
-                '{timestamp}',
-                '{user_id}',
-                '{session_id}',
-                '{country}',
-                '{query_text_escaped}',
-                '{agent_response_escaped}',
-                '{result_preview_escaped}',
-                {cost},
-                '{citations_escaped}',
-                '{tool_used}',
-                '{judge_response_escaped}',
-                '{judge_verdict_text}',
-                {judge_confidence},
-                '{error_text}',
-                '{validation_mode}',
-                {validation_attempts},
-                {elapsed}
-            )
-            """
-
-            result = self.w.statement_execution.execute_statement(
-                warehouse_id=self.warehouse_id,
-                statement=insert_query,
-                wait_timeout="10s"
-            )
 
-            logger.info(f"✅ Governance table logged: {session_id}")
+            _governance_batcher.submit(GovernanceRow(
+                event_id=event_id,
+                timestamp=timestamp,
+                user_id=user_id,
+                session_id=session_id,
+                country=country,
+                query_string=query_string,
+                agent_response=answer_truncated,
+                result_preview=result_preview,
+                cost=cost,
+                citations=citations_data,
+                tool_used=tool_used,
+                judge_response=judge_response_data,
+                judge_verdict=judge_verdict_text,
+                judge_confidence=judge_confidence,
+                error_info=error_text,
+                validation_mode=validation_mode,
+                validation_attempts=validation_attempts,
+                total_time_seconds=elapsed
+            ))
+            logger.info(f"✅ Governance row queued: {session_id}")
         except Exception as e:
             logger.info(f"⚠️ Governance logging failed: {e}")
 
 
-def _async_audit_logging(
-    audit_logger,
-    obs,
-    session_id,
-    user_id,
-    country,
-    query_string,
-    answer,
-    judge_verdict,
-    tools_called,
-    total_cost,
-    citations,
-    elapsed,
-    classification_method
-):
+def _aggregate_llm_results(results):
+    """Sum duration, input/output tokens and cost over synthesis or validation attempts in one pass"""
+    duration = 0
+    input_tokens = output_tokens = 0
+    cost = 0.0
+    for r in results:
+        duration += r.get('duration', 0)
+        input_tokens += r.get('input_tokens', 0)
+        output_tokens += r.get('output_tokens', 0)
+        cost += r.get('cost', 0.0)
+    return duration, input_tokens, output_tokens, cost
+
+
+@functools.lru_cache(maxsize=1)
+def get_audit_logger():
+    """Get the process-wide AuditLogger, creating it on first use"""
+    return AuditLogger()
+
+
+def log_cached_answer(user_id, session_id, country, query_string, result, elapsed):
+    """
+    Queue the governance audit row for an answer served from a result cache.
+
+    The agent (and Phase 8) never runs for a cache hit, but the governance table is the
+    compliance record of who was told what, so every served answer still gets a row:
+    tool_used='result_cache' and cost 0, since no LLM or SQL spend happened.
+    """
+    judge_verdict = dict(result.get('judge_verdict') or {})
+    judge_verdict.setdefault('validation_mode', result.get('validation_mode', 'llm_judge'))
+    get_audit_logger().log_to_governance_table(
+        session_id=session_id,
+        user_id=user_id,
+        country=country,
+        query_string=query_string,
+        answer=result.get('answer'),
+        judge_verdict=judge_verdict,
+        tools_called=['result_cache'],
+        cost=0.0,
+        citations=result.get('citations') or [],
+        elapsed=elapsed,
+        classification_method='result_cache'
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class Phase8State:
+    """Everything the background Phase 8 task needs from one agent query"""
+    audit_logger: AuditLogger
+    obs: Any
+    session_id: str
+    user_id: str
+    country: str
+    query_string: str
+    answer: str
+    judge_verdict: dict
+    tools_called: list
+    total_cost: float
+    citations: list
+    elapsed: float
+    classification_method: str
+    cost_metadata: dict
+    mlflow_run_id: Optional[str]
+    phase8_start: float
+
+
+def _run_phase8(state):
     """
-    Async function to handle audit logging in background.
-    Runs in a separate thread to avoid blocking response.
-    Note: Phase tracking happens in main thread, not here.
+    Background Phase 8 logging - doesn't block the response.
+    Runs on _AUDIT_EXECUTOR; phase tracking happens in the request thread, not here.
     """
     try:
-        logger.info("📍 PHASE 8: Audit Logging (running in background)")
-        logger.info(f"🔄 Logging to MLflow and governance table...")
-
-        # Log to governance table
+        # Log to governance table (🆕 FIX #6: cost metadata goes into error_info)
         try:
-            audit_logger.log_to_governance_table(
-                session_id=session_id,
-                user_id=user_id,
-                country=country,
-                query_string=query_string,
-                answer=answer,
-                judge_verdict=judge_verdict,
-                tools_called=tools_called,
-                cost=total_cost,
-                citations=citations,
-                elapsed=elapsed,
-                error_info=None,
-                classification_method=classification_method
+            state.audit_logger.log_to_governance_table(
+                session_id=state.session_id,
+                user_id=state.user_id,
+                country=state.country,
+                query_string=state.query_string,
+                answer=state.answer,
+                judge_verdict=state.judge_verdict,
+                tools_called=state.tools_called,
+                cost=state.total_cost,
+                citations=state.citations,
+                elapsed=state.elapsed,
+                error_info=state.cost_metadata,
+                classification_method=state.classification_method,
+                error_kind='cost_metadata'
             )
-            logger.info(f"✅ Governance table logged: {session_id}")
+            logger.info(f"✅ Governance table logged: {state.session_id}")
         except Exception as gov_error:
             logger.error(f"⚠️ Governance logging failed: {gov_error}", exc_info=True)
 
-        # End observability run
-        if obs:
-            try:
-                obs.end_agent_run(
-                    response=answer or "",
-                    success=True,
-                    error=None
-                )
-            except Exception as obs_error:
-                logger.info(f"⚠️ Error ending observability run: {obs_error}")
-                # Force end any active MLflow run
-                try:
-                    import mlflow
-                    if mlflow.active_run():
-                        mlflow.end_run()
-                except:
-                    pass
+        # Run was ended synchronously in the request thread; attach its metrics summary by run ID
+        if state.obs and state.mlflow_run_id:
+            state.obs.log_metrics_summary(state.mlflow_run_id, state.obs.run_metrics)
 
-        logger.info(f"✅ Phase 8 (Audit Logging) completed in background")
+        phase8_duration = time.time() - state.phase8_start
+        logger.info(f"✅ Phase 8 completed in background ({phase8_duration:.3f}s)")
 
-    except Exception as e:
-        logger.error(f"⚠️ Background audit logging error: {e}", exc_info=True)
+    except Exception as async_error:
+        logger.error(f"❌ Background Phase 8 logging error: {async_error}", exc_info=True)
 
 
-@mlflow.trace(name="pension_advisor_query", span_type="AGENT")  # ✅ FIX #4: Re-enabled for distributed tracing
 def agent_query(
     user_id,
     session_id,
@@ -211,13 +507,52 @@ def agent_query(
     Shows phases dropdown with real-time updates as execution progresses
     Includes MLflow tracking, Lakehouse Monitoring, and distributed tracing
 
-    @mlflow.trace automatically captures:
-    - Function inputs/outputs
+    A sampled fraction of queries (MLFLOW_TRACE_SAMPLE_RATE) runs inside an
+    MLflow AGENT span, which captures:
+    - Query inputs and a summary of the outputs
     - Execution time
     - Nested LLM calls
     - Tool executions
     - Validation steps
+    Unsampled queries skip span creation and input/output serialization entirely.
     """
+    if random.random() >= MLFLOW_TRACE_SAMPLE_RATE:
+        return _agent_query_impl(user_id, session_id, country, query_string, validation_mode, enable_observability)
+
+    traced_start = time.perf_counter()
+    with mlflow.start_span(name="pension_advisor_query", span_type="AGENT") as span:
+        span.set_inputs({
+            'user_id': user_id,
+            'session_id': session_id,
+            'country': country,
+            'query_string': query_string,
+            'validation_mode': validation_mode
+        })
+        impl_start = time.perf_counter()
+        result = _agent_query_impl(user_id, session_id, country, query_string, validation_mode, enable_observability)
+        impl_elapsed = time.perf_counter() - impl_start
+        # Only the fields needed to inspect a trace; response_dict can be large
+        span.set_outputs({
+            'answer': result.get('answer'),
+            'error': result.get('error'),
+            'cost': result.get('cost'),
+            'judge_verdict': result.get('judge_verdict'),
+            'tools_called': result.get('tools_called')
+        })
+    # Span setup, input/output serialization and export: what tracing costs this query
+    logger.debug(f"🔍 Tracing overhead: {(time.perf_counter() - traced_start - impl_elapsed) * 1000:.1f}ms")
+    return result
+
+
+def _agent_query_impl(
+    user_id,
+    session_id,
+    country,
+    query_string,
+    validation_mode,
+    enable_observability
+):
+    """Run the advisory pipeline for agent_query (untraced)"""
 
     # ✅ PROGRESS TRACKER - Initialization removed (handled in app.py inside expander)
     # Only reset is needed here to clear stale state
@@ -235,7 +570,7 @@ def agent_query(
     total_cost = 0.0
     cost_breakdown = {}
 
-    audit_logger = AuditLogger()
+    audit_logger = get_audit_logger()
     
     # ✅ INITIALIZE OBSERVABILITY (MLflow + Lakehouse Monitoring)
     obs = None
@@ -267,9 +602,6 @@ def agent_query(
         logger.info(f"{'='*70}\n")
 
         # ✅ INPUT GUARDRAILS - Pre-generation validation
-        from src.ai_guardrails import validate_input
-        from src.config import AI_GUARDRAILS_ENABLED, AI_GUARDRAILS_CONFIG
-
         if AI_GUARDRAILS_ENABLED:
             logger.info("🛡️  Running input guardrails...")
             input_validation = validate_input(
@@ -324,26 +656,21 @@ def agent_query(
         # ✅ FIX #1: Removed duplicate governance logging (moved to Phase 8)
         # Governance logging now happens ONCE at Phase 8 (lines 566-583)
 
+        # Bind everything read from result_dict once; later phases use these locals
         tools_called = result_dict.get('tools_used', [])
-        
-        # ✅ LOG CLASSIFICATION TO OBSERVABILITY
-        if obs and 'classification' in result_dict:
-            obs.log_classification(result_dict['classification'])
-        
-        # ✅ LOG TOOL EXECUTION TO OBSERVABILITY
-        tool_results_dict = result_dict.get('tool_results', {})
-        if obs:
-            obs.log_tool_execution(tools_called, tool_results_dict or {})
+        synthesis_results = result_dict.get('synthesis_results', [])
+        validation_results = result_dict.get('validation_results', [])
+        classification_info = result_dict.get('classification') or {}
         
         # Calculate ONLY tool execution time (subtract synthesis + validation)
         phase4_total = time.time() - phase4_start
-        synthesis_results = result_dict.get('synthesis_results', [])
-        validation_results = result_dict.get('validation_results', [])
-        synthesis_time = sum(s.get('duration', 0) for s in synthesis_results)
-        validation_time = sum(v.get('duration', 0) for v in validation_results)
+        (synthesis_duration, total_synthesis_input_tokens,
+         total_synthesis_output_tokens, total_synthesis_cost) = _aggregate_llm_results(synthesis_results)
+        (validation_duration, total_validation_input_tokens,
+         total_validation_output_tokens, total_validation_cost) = _aggregate_llm_results(validation_results)
         
         # Phase 4 = total - synthesis - validation = pure tool/orchestration time
-        phase4_duration = phase4_total - synthesis_time - validation_time
+        phase4_duration = phase4_total - synthesis_duration - validation_duration
         
         logger.info(f"✓ Tools executed: {', '.join(tools_called) if tools_called else 'none'}")
         logger.info(f"⏱️  Phase 4 pure tool execution: {phase4_duration:.2f}s (excluding LLM time)")
@@ -356,10 +683,6 @@ def agent_query(
         answer = result_dict.get('response', '')
         response_dict = result_dict
         citations = result_dict.get('citations', [])
-        synthesis_results = result_dict.get('synthesis_results', [])
-
-        # Calculate actual synthesis time from results
-        synthesis_duration = sum(s.get('duration', 0) for s in synthesis_results)
 
         logger.info(f"✓ Response synthesized: {len(answer)} chars")
         logger.info(f"⏱️  Phase 5 actual synthesis time: {synthesis_duration:.2f}s")
@@ -367,18 +690,9 @@ def agent_query(
         # ✅ Note: Phase tracking for synthesis happens INSIDE ReAct loop
         # This is just logging the final duration
         
-        # ✅ LOG SYNTHESIS TO OBSERVABILITY
-        if obs:
-            obs.log_synthesis(synthesis_results)
-        
         # PHASE 6: LLM VALIDATION (Extract actual validation duration from results)
         logger.info("\n📍 PHASE 6: LLM Validation")
         
-        validation_results = result_dict.get('validation_results', [])
-        
-        # Calculate actual validation time from results
-        validation_duration = sum(v.get('duration', 0) for v in validation_results)
-        
         if validation_results:
             final_validation = validation_results[-1]
             judge_verdict = {
@@ -408,18 +722,20 @@ def agent_query(
         # ✅ Note: Phase tracking for validation happens INSIDE ReAct loop
         # This is just logging the final duration
 
-        # ✅ LOG VALIDATION TO OBSERVABILITY
+        # ✅ LOG CLASSIFICATION, TOOLS, SYNTHESIS AND VALIDATION TO OBSERVABILITY (one batch)
         if obs:
-            obs.log_validation(validation_results)
+            obs.log_stage_results(
+                classification=result_dict['classification'] if 'classification' in result_dict else None,
+                tools_used=tools_called,
+                tool_results=result_dict.get('tool_results') or {},
+                synthesis_results=synthesis_results,
+                validation_results=validation_results
+            )
 
         # Name restoration (part of finalization, not a separate tracked phase)
         logger.info(f"✓ Member name restored")
 
-        # 🆕 Calculate SYNTHESIS LLM costs
-        total_synthesis_input_tokens = sum(s.get('input_tokens', 0) for s in synthesis_results)
-        total_synthesis_output_tokens = sum(s.get('output_tokens', 0) for s in synthesis_results)
-        total_synthesis_cost = sum(s.get('cost', 0.0) for s in synthesis_results)
-
+        # 🆕 SYNTHESIS LLM costs (summed with the durations in Phase 4)
         synthesis_model = synthesis_results[0].get('model', 'claude-opus-4-1') if synthesis_results else 'claude-opus-4-1'
 
         cost_breakdown['synthesis'] = {
@@ -433,11 +749,7 @@ def agent_query(
         logger.info(f"💰 Synthesis cost: ${total_synthesis_cost:.6f} ({synthesis_model})")
         logger.info(f"   └─ {total_synthesis_input_tokens} input + {total_synthesis_output_tokens} output tokens across {len(synthesis_results)} attempt(s)")
 
-        # 🆕 Calculate VALIDATION LLM costs
-        total_validation_input_tokens = sum(v.get('input_tokens', 0) for v in validation_results)
-        total_validation_output_tokens = sum(v.get('output_tokens', 0) for v in validation_results)
-        total_validation_cost = sum(v.get('cost', 0.0) for v in validation_results)
-
+        # 🆕 VALIDATION LLM costs (summed with the durations in Phase 4)
         validation_model = validation_results[0].get('model', 'claude-sonnet-4') if validation_results else 'claude-sonnet-4'
 
         cost_breakdown['validation'] = {
@@ -452,7 +764,6 @@ def agent_query(
         logger.info(f"   └─ {total_validation_input_tokens} input + {total_validation_output_tokens} output tokens across {len(validation_results)} attempt(s)")
 
         # 🆕 FIX #2 & #5: Extract classification cost and build breakdown
-        classification_info = result_dict.get('classification', {})
         classification_cost = classification_info.get('cost_usd', 0.0)
         classification_method = classification_info.get('method', 'unknown')
         classification_latency = classification_info.get('latency_ms', 0.0)
@@ -485,135 +796,94 @@ def agent_query(
 
         elapsed = time.time() - start_all
 
-        logger.info(f"\n{'='*70}")
-        logger.info(f"✅ Query completed in {elapsed:.2f}s")
-        logger.info(f"💰 TOTAL COST: ${total_cost:.6f}")
-        logger.info(f"   ├─ Classification:        ${classification_cost:.6f}")
-        logger.info(f"   ├─ Synthesis (Opus 4.1):  ${total_synthesis_cost:.6f}")
-        logger.info(f"   └─ Validation (Sonnet 4): ${total_validation_cost:.6f}")
-        logger.info(f"🔧 Tools used: {', '.join(tools_called)}")
-        logger.info(f"📊 Total tokens: {cost_breakdown['total']['total_tokens']:,}")
-
-        logger.info(f"\n⏱️  PHASE TIMING BREAKDOWN:")
-        logger.info(f"   Phase 1 (Retrieval):     {phase1_duration:.2f}s")
-        logger.info(f"   Phase 2 (Anonymization): {phase2_duration:.2f}s")
-        logger.info(f"   Phase 4 (Execution):     {phase4_duration:.2f}s")
-        logger.info(f"   Phase 5 (Synthesis):     {synthesis_duration:.2f}s (actual LLM time)")
-        logger.info(f"   Phase 6 (Validation):    {validation_duration:.2f}s (actual LLM time)")
-        logger.info(f"   Phase 7 (Restoration):   <0.01s (not tracked separately)")
-        logger.info(f"   Phase 8 (Logging):       (MLflow sync, governance async...)")
-        logger.info(f"{'='*70}\n")
+        # One record for the whole summary: a single lock/format/handler dispatch per query,
+        # with the raw numbers attached for structured (JSON) handlers
+        phase_timings = {
+            'phase1_retrieval': phase1_duration,
+            'phase2_anonymization': phase2_duration,
+            'phase4_execution': phase4_duration,
+            'phase5_synthesis': synthesis_duration,
+            'phase6_validation': validation_duration
+        }
+        logger.info(
+            f"✅ Query completed in {elapsed:.2f}s | 💰 ${total_cost:.6f} | "
+            f"📊 {cost_breakdown['total']['total_tokens']:,} tokens | 🔧 {', '.join(tools_called) or 'none'}",
+            extra={'phase_timings': phase_timings, 'costs': cost_breakdown['total'], 'tools': tools_called}
+        )
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"\n{'='*70}\n"
+                f"💰 TOTAL COST: ${total_cost:.6f}\n"
+                f"   ├─ Classification:        ${classification_cost:.6f}\n"
+                f"   ├─ Synthesis (Opus 4.1):  ${total_synthesis_cost:.6f}\n"
+                f"   └─ Validation (Sonnet 4): ${total_validation_cost:.6f}\n"
+                f"\n⏱️  PHASE TIMING BREAKDOWN:\n"
+                f"   Phase 1 (Retrieval):     {phase1_duration:.2f}s\n"
+                f"   Phase 2 (Anonymization): {phase2_duration:.2f}s\n"
+                f"   Phase 4 (Execution):     {phase4_duration:.2f}s\n"
+                f"   Phase 5 (Synthesis):     {synthesis_duration:.2f}s (actual LLM time)\n"
+                f"   Phase 6 (Validation):    {validation_duration:.2f}s (actual LLM time)\n"
+                f"   Phase 7 (Restoration):   <0.01s (not tracked separately)\n"
+                f"   Phase 8 (Logging):       (MLflow sync, governance async...)\n"
+                f"{'='*70}\n"
+            )
 
         # PHASE 8: AUDIT LOGGING
-        # MLflow logging MUST run synchronously (before finally block closes the run)
-        # Governance logging can run async (doesn't depend on MLflow run)
+        # Ending the MLflow run MUST run synchronously (before finally block closes the run);
+        # the metrics summary artifact and governance logging run in the background
 
         mark_phase_running('phase_8_logging')
         phase8_start = time.time()
 
         # ✅ FIX: End MLflow run SYNCHRONOUSLY (before finally block)
+        mlflow_run_id = None
         if obs:
             try:
                 logger.info(f"🔍 Ending MLflow run synchronously...")
+                if obs.current_run:
+                    mlflow_run_id = obs.current_run.info.run_id
                 obs.end_agent_run(
                     response=answer or "",
                     success=True,
-                    error=None
+                    error=None,
+                    log_summary=False
                 )
                 logger.info(f"✅ MLflow logging complete")
             except Exception as obs_error:
                 logger.error(f"⚠️ Error ending observability run: {obs_error}", exc_info=True)
 
-        # Launch background thread for governance logging ONLY
-        import threading
-
-        def async_phase8_logging():
-            """Background thread for Phase 8 logging - doesn't block response"""
-            try:
-                # 🆕 FIX #6: Extract classification method and prepare cost metadata
-                try:
-                    classification_info = result_dict.get('classification', {})
-                    classification_method = classification_info.get('method', 'unknown') if classification_info else 'unknown'
-
-                    # Build cost metadata for governance logging
-                    import json
-                    cost_metadata = json.dumps({
-                        'classification_cost': classification_cost,
-                        'classification_method': classification_method,
-                        'synthesis_cost': total_synthesis_cost,
-                        'validation_cost': total_validation_cost,
-                        'total_cost': total_cost
-                    })
-                except Exception as class_err:
-                    logger.warning(f"⚠️ Could not extract classification metadata: {class_err}")
-                    classification_method = 'unknown'
-                    cost_metadata = None
-
-                # Log to governance table
-                try:
-                    audit_logger.log_to_governance_table(
-                        session_id=session_id,
-                        user_id=user_id,
-                        country=country,
-                        query_string=query_string,
-                        answer=answer,
-                        judge_verdict=judge_verdict,
-                        tools_called=tools_called,
-                        cost=total_cost,
-                        citations=citations,
-                        elapsed=elapsed,
-                        error_info=cost_metadata,
-                        classification_method=classification_method
-                    )
-                    logger.info(f"✅ Governance table logged: {session_id}")
-                except Exception as gov_error:
-                    logger.error(f"⚠️ Governance logging failed: {gov_error}", exc_info=True)
-
-                # MLflow logging already completed synchronously (above)
-                # No need to call obs.end_agent_run() here
-
-                phase8_duration = time.time() - phase8_start
-                logger.info(f"✅ Phase 8 completed in background ({phase8_duration:.3f}s)")
-
-            except Exception as async_error:
-                logger.error(f"❌ Background Phase 8 logging error: {async_error}", exc_info=True)
-
-        # Start background thread for logging
-        # daemon=False: Thread will complete even if main program exits (prevents log loss)
-        # This is safe for Streamlit - thread completes before next request
-        logging_thread = threading.Thread(
-            target=async_phase8_logging,
-            daemon=False,  # ✅ Non-daemon: logs won't be lost on exit/reload
-            name=f"Phase8-Logging-{session_id[:8]}"
-        )
-        logging_thread.start()
-        logger.info(f"🚀 Phase 8 logging started in background thread (thread: {logging_thread.name})")
+        # Hand off the MLflow metrics summary + governance logging to the shared Phase 8 pool;
+        # its atexit shutdown (or wait_for_pending_logging) waits for pending tasks
+        _submit_phase8(Phase8State(
+            audit_logger=audit_logger,
+            obs=obs,
+            session_id=session_id,
+            user_id=user_id,
+            country=country,
+            query_string=query_string,
+            answer=answer,
+            judge_verdict=judge_verdict,
+            tools_called=tools_called,
+            total_cost=total_cost,
+            citations=citations,
+            elapsed=elapsed,
+            classification_method=classification_method,
+            cost_metadata={
+                'classification_cost': classification_cost,
+                'classification_method': classification_method,
+                'synthesis_cost': total_synthesis_cost,
+                'validation_cost': total_validation_cost,
+                'total_cost': total_cost
+            },
+            mlflow_run_id=mlflow_run_id,
+            phase8_start=phase8_start
+        ))
+        logger.info(f"🚀 Phase 8 logging submitted to background pool")
 
         # Mark Phase 8 as complete immediately (async, non-blocking)
         # The actual logging happens in background but doesn't block the response
         mark_phase_complete('phase_8_logging', duration=0.001)  # Minimal duration since it's async
-
-        # ✅ OPTIONAL: Add to global thread tracker for monitoring
-        # This helps prevent orphaned threads in long-running processes
-        import atexit
-        if not hasattr(agent_query, '_logging_threads'):
-            agent_query._logging_threads = []
-
-            def cleanup_logging_threads():
-                """Wait for all logging threads to complete on shutdown"""
-                pending = [t for t in agent_query._logging_threads if t.is_alive()]
-                if pending:
-                    logger.info(f"⏳ Waiting for {len(pending)} logging thread(s) to complete...")
-                    for t in pending:
-                        t.join(timeout=10)  # Wait max 10s per thread
-                    logger.info("✅ All logging threads completed")
-
-            atexit.register(cleanup_logging_threads)
-
-        agent_query._logging_threads.append(logging_thread)
-
-        # Clean up old completed threads (prevent memory leak)
-        agent_query._logging_threads = [t for t in agent_query._logging_threads if t.is_alive()]
     
     except Exception as e:
         error_info = traceback.format_exc()
@@ -648,7 +918,8 @@ def agent_query(
             citations=[],
             elapsed=elapsed,
             error_info=error_info,
-            classification_method='error'
+            classification_method='error',
+            error_kind='traceback'
         )
         
         # ✅ End observability run AFTER error logging (but BEFORE logger.log_to_mlflow)
@@ -664,7 +935,6 @@ def agent_query(
                 logger.info(f"⚠️ Error ending observability run: {obs_error}")
                 # Force end any active MLflow run
                 try:
-                    import mlflow
                     if mlflow.active_run():
                         mlflow.end_run(status="FAILED")
                 except:
@@ -689,7 +959,6 @@ def agent_query(
         # ✅ CRITICAL: Only force end MLflow run if STILL active after all operations
         # Don't end if obs.end_agent_run() already ended it
         try:
-            import mlflow
             if mlflow.active_run():
                 # Only end if obs didn't already end it
                 if obs and hasattr(obs, 'current_run') and obs.current_run:
@@ -706,8 +975,6 @@ def agent_query(
             pass
     
     # ✅ OUTPUT GUARDRAILS - Post-generation validation
-    from src.ai_guardrails import validate_output
-
     output_guardrails_info = None
     if AI_GUARDRAILS_ENABLED and answer:
         logger.info("🛡️  Running output guardrails...")
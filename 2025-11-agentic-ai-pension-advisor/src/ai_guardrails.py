@@ -41,8 +41,103 @@ from src.shared.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# RE2 (google-re2) matches in linear time, so attacker-controlled queries can't trigger
+# catastrophic backtracking; fall back to the stdlib engine when it isn't installed
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Aho-Corasick finds every keyword in one pass over the text (pyahocorasick, optional)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+def _compile_guardrail_pattern(pattern):
+    """Compile a case-insensitive guardrail pattern with RE2 if available, else stdlib re."""
+    if RE2_AVAILABLE:
+        # google-re2 has no IGNORECASE flag; case folding is set through Options
+        options = re2.Options()
+        options.case_sensitive = False
+        try:
+            return re2.compile(pattern, options)
+        except Exception:
+            logger.warning(f"RE2 rejected guardrail pattern, using re: {pattern}")
+    return re.compile(pattern, re.IGNORECASE)
+
+# Policy bits: policy names (from config or callers) map onto the checks they enable
+_POLICY_PII_DETECTION = 1
+_POLICY_TOXICITY = 2
+_POLICY_PROMPT_INJECTION = 4
+_POLICY_JAILBREAK = 8
+_POLICY_GROUNDEDNESS = 16
+_POLICY_PII_MASKING = 32
+
+_POLICY_BITS = {
+    'pii': _POLICY_PII_DETECTION | _POLICY_PII_MASKING,
+    'pii_detection': _POLICY_PII_DETECTION,
+    'pii_masking': _POLICY_PII_MASKING,
+    'toxicity': _POLICY_TOXICITY,
+    'toxicity_threshold': _POLICY_TOXICITY,
+    'prompt_injection': _POLICY_PROMPT_INJECTION,
+    'jailbreak': _POLICY_JAILBREAK,
+    'jailbreak_detection': _POLICY_JAILBREAK,
+    'groundedness': _POLICY_GROUNDEDNESS,
+    'groundedness_check': _POLICY_GROUNDEDNESS,
+}
+
+
+# Luhn doubling: digit d at an even offset from the right contributes _LUHN_DOUBLED[d]
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+# ATO Tax File Number check weights (9-digit TFN)
+_TFN_WEIGHTS = (1, 4, 3, 7, 5, 8, 6, 9, 10)
+
+
+def _digits(text: str) -> str:
+    """Digits of a matched number with separators removed."""
+    return ''.join(ch for ch in text if ch.isdigit())
+
+
+def _luhn_valid(text: str) -> bool:
+    """Whether a matched card number passes the Luhn checksum."""
+    digits = _digits(text)
+    total = 0
+    for offset, ch in enumerate(reversed(digits)):
+        d = ord(ch) - 48
+        total += _LUHN_DOUBLED[d] if offset & 1 else d
+    return total % 10 == 0
+
+
+def _tfn_valid(text: str) -> bool:
+    """Whether a matched 9-digit number passes the TFN weighted checksum."""
+    digits = _digits(text)
+    if len(digits) != len(_TFN_WEIGHTS):
+        return False
+    return sum(w * (ord(ch) - 48) for w, ch in zip(_TFN_WEIGHTS, digits)) % 11 == 0
+
+
+def _extends_digit_run(match) -> bool:
+    """Whether a match is part of a longer number, e.g. the first 12 digits of a card number."""
+    text, start, end = match.string, match.start(), match.end()
+    # Step over at most one separator on each side; RE2 has no lookaround to do this in the pattern
+    before = text[max(0, start - 2):start].rstrip(' \t\r\n-')
+    after = text[end:end + 2].lstrip(' \t\r\n-')
+    return before[-1:].isdigit() or after[:1].isdigit()
+
 
-@dataclass
+def _policy_mask(policies) -> int:
+    """OR together the bits of the named policies (unknown names are ignored)."""
+    mask = 0
+    for policy in policies:
+        mask |= _POLICY_BITS.get(policy, 0)
+    return mask
+
+
+@dataclass(slots=True)
 class GuardrailResult:
     """
     Result from guardrail validation.
@@ -146,6 +241,46 @@ class SafetyGuardrails:
         r'bypass\s+restrictions?',
     ]
 
+    # Compiled once at class load; guardrails run on every input and output
+    _PII_REGEXES = {name: _compile_guardrail_pattern(pattern) for name, pattern in PII_PATTERNS.items()}
+    # Patterns with a check digit only count as PII when a match passes its checksum,
+    # so order numbers and other long digit runs aren't flagged or masked. Aadhaar matches
+    # must stand alone, or a Luhn-invalid card number gets its first 12 digits taken as one.
+    _PII_VALIDATORS = {
+        'credit_card': lambda match: _luhn_valid(match.group()),
+        'au_tfn': lambda match: _tfn_valid(match.group()),
+        'in_aadhaar': lambda match: not _extends_digit_run(match),
+    }
+    # All PII patterns as one alternation: a single scan answers "any PII at all?"
+    _PII_ANY = _compile_guardrail_pattern('|'.join(f'(?:{pattern})' for pattern in PII_PATTERNS.values()))
+    # Same union over bytes, for ASCII text: \b and \d skip Unicode classification there
+    _PII_ANY_BYTES = _compile_guardrail_pattern(
+        '|'.join(f'(?:{pattern})' for pattern in PII_PATTERNS.values()).encode('ascii')
+    )
+    # Injection/jailbreak checks only report presence, so each family is a single alternation
+    _INJECTION_ANY = _compile_guardrail_pattern('|'.join(f'(?:{pattern})' for pattern in INJECTION_PATTERNS))
+    _JAILBREAK_ANY = _compile_guardrail_pattern('|'.join(f'(?:{pattern})' for pattern in JAILBREAK_PATTERNS))
+    # Phrases that mark a response as ungrounded, matched case-insensitively in one scan
+    _GROUNDEDNESS_ERROR_INDICATORS = [
+        "i don't know",
+        "i'm not sure",
+        "i cannot",
+        "error",
+        "failed"
+    ]
+    _GROUNDEDNESS_ERROR_ANY = _compile_guardrail_pattern(
+        '|'.join(re.escape(indicator) for indicator in _GROUNDEDNESS_ERROR_INDICATORS)
+    )
+
+    if AHOCORASICK_AVAILABLE:
+        _TOXIC_AUTOMATON = ahocorasick.Automaton()
+        for _keyword in TOXIC_KEYWORDS:
+            _TOXIC_AUTOMATON.add_word(_keyword, _keyword)
+        _TOXIC_AUTOMATON.make_automaton()
+        del _keyword
+    else:
+        _TOXIC_AUTOMATON = None
+
     def __init__(self, config: Optional[Dict] = None):
         """
         Initialize safety guardrails with configuration.
@@ -163,6 +298,12 @@ class SafetyGuardrails:
         # Thresholds
         self.toxicity_threshold = self.input_policies.get('toxicity_threshold', 0.7)
 
+        # Default policy lists and their bitmasks, used when callers don't pass policies
+        self._input_policy_list = list(self.input_policies.keys())
+        self._input_policy_mask = _policy_mask(self._input_policy_list)
+        self._output_policy_list = list(self.output_policies.keys())
+        self._output_policy_mask = _policy_mask(self._output_policy_list)
+
         logger.info(f"SafetyGuardrails initialized (enabled={self.enabled})")
 
     def validate_input(
@@ -183,35 +324,38 @@ class SafetyGuardrails:
         if not self.enabled:
             return GuardrailResult(blocked=False, passed=True, violations=[])
 
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         violations = []
-        policies_checked = policies or list(self.input_policies.keys())
+        if policies:
+            policies_checked, mask = policies, _policy_mask(policies)
+        else:
+            policies_checked, mask = self._input_policy_list, self._input_policy_mask
 
         # Check PII
-        if 'pii_detection' in policies_checked or 'pii' in policies_checked:
+        if mask & _POLICY_PII_DETECTION:
             pii_found = self._detect_pii(query)
             if pii_found:
                 violations.extend([f"PII detected: {pii_type}" for pii_type in pii_found])
 
         # Check toxicity
-        if 'toxicity' in policies_checked or 'toxicity_threshold' in policies_checked:
+        if mask & _POLICY_TOXICITY:
             is_toxic, toxic_score = self._check_toxicity(query)
             if is_toxic:
                 violations.append(f"Toxic content (score: {toxic_score:.2f})")
 
         # Check prompt injection
-        if 'prompt_injection' in policies_checked:
+        if mask & _POLICY_PROMPT_INJECTION:
             is_injection = self._detect_prompt_injection(query)
             if is_injection:
                 violations.append("Prompt injection detected")
 
         # Check jailbreak
-        if 'jailbreak_detection' in policies_checked or 'jailbreak' in policies_checked:
+        if mask & _POLICY_JAILBREAK:
             is_jailbreak = self._detect_jailbreak(query)
             if is_jailbreak:
                 violations.append("Jailbreak attempt detected")
 
-        latency_ms = (time.time() - start_time) * 1000
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         blocked = len(violations) > 0
 
         result = GuardrailResult(
@@ -224,7 +368,7 @@ class SafetyGuardrails:
         )
 
         if blocked:
-            logger.warning(f"Input blocked: {violations}")
+            logger.warning("Input blocked: %s", violations)
 
         return result
 
@@ -251,33 +395,35 @@ class SafetyGuardrails:
                 masked_text=response
             )
 
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         violations = []
         masked_text = response
         masked = False
-        policies_checked = policies or list(self.output_policies.keys())
+        if policies:
+            policies_checked, mask = policies, _policy_mask(policies)
+        else:
+            policies_checked, mask = self._output_policy_list, self._output_policy_mask
 
         # Check and mask PII
-        if 'pii_masking' in policies_checked or 'pii' in policies_checked:
-            pii_found = self._detect_pii(response)
+        if mask & _POLICY_PII_MASKING:
+            masked_text, pii_found = self._mask_and_detect_pii(response)
             if pii_found:
-                masked_text = self._mask_pii(response)
                 masked = True
                 violations.append(f"PII masked: {', '.join(pii_found)}")
 
         # Check toxicity (shouldn't happen, but check anyway)
-        if 'toxicity' in policies_checked or 'toxicity_threshold' in policies_checked:
+        if mask & _POLICY_TOXICITY:
             is_toxic, toxic_score = self._check_toxicity(response)
             if is_toxic:
                 violations.append(f"Toxic output (score: {toxic_score:.2f})")
 
         # Check groundedness (basic validation)
-        if 'groundedness_check' in policies_checked or 'groundedness' in policies_checked:
+        if mask & _POLICY_GROUNDEDNESS:
             is_grounded = self._check_groundedness(response)
             if not is_grounded:
                 violations.append("Response may not be grounded in facts")
 
-        latency_ms = (time.time() - start_time) * 1000
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         blocked = any("Toxic" in v for v in violations)  # Only block toxic output
 
         result = GuardrailResult(
@@ -292,7 +438,7 @@ class SafetyGuardrails:
         )
 
         if violations:
-            logger.info(f"Output validation: {violations}")
+            logger.info("Output validation: %s", violations)
 
         return result
 
@@ -300,20 +446,60 @@ class SafetyGuardrails:
         """Detect PII in text using regex patterns."""
         found_pii = []
 
-        for pii_type, pattern in self.PII_PATTERNS.items():
-            if re.search(pattern, text, re.IGNORECASE):
+        if not self._has_any_pii(text):
+            return found_pii
+
+        for pii_type, regex in self._PII_REGEXES.items():
+            validator = self._PII_VALIDATORS.get(pii_type)
+            if validator is None:
+                if regex.search(text):
+                    found_pii.append(pii_type)
+            elif any(validator(match) for match in regex.finditer(text)):
                 found_pii.append(pii_type)
 
         return found_pii
 
+    def _has_any_pii(self, text: str) -> bool:
+        """Most text has no PII: one pass over the union, instead of one per pattern."""
+        if text.isascii():
+            return self._PII_ANY_BYTES.search(text.encode('ascii')) is not None
+        return self._PII_ANY.search(text) is not None
+
     def _mask_pii(self, text: str) -> str:
         """Mask PII in text with [REDACTED]."""
-        masked_text = text
+        return self._mask_and_detect_pii(text)[0]
 
-        for pii_type, pattern in self.PII_PATTERNS.items():
-            masked_text = re.sub(pattern, '[REDACTED]', masked_text, flags=re.IGNORECASE)
+    def _mask_and_detect_pii(self, text: str) -> tuple[str, List[str]]:
+        """
+        Mask PII in text and report which types were masked, in one pass per pattern.
 
-        return masked_text
+        Returns:
+            (masked_text, pii_types_masked)
+        """
+        found_pii = []
+        if not self._has_any_pii(text):
+            return text, found_pii
+
+        masked_text = text
+        for pii_type, regex in self._PII_REGEXES.items():
+            validator = self._PII_VALIDATORS.get(pii_type)
+            if validator is None:
+                masked_text, count = regex.subn('[REDACTED]', masked_text)
+            else:
+                valid = []
+
+                def redact_valid(match, validator=validator, valid=valid):
+                    if validator(match):
+                        valid.append(True)
+                        return '[REDACTED]'
+                    return match.group()
+
+                masked_text = regex.sub(redact_valid, masked_text)
+                count = len(valid)
+            if count:
+                found_pii.append(pii_type)
+
+        return masked_text, found_pii
 
     def _check_toxicity(self, text: str) -> tuple[bool, float]:
         """
@@ -324,8 +510,11 @@ class SafetyGuardrails:
         """
         text_lower = text.lower()
 
-        # Count toxic keywords
-        toxic_count = sum(1 for keyword in self.TOXIC_KEYWORDS if keyword in text_lower)
+        # Count toxic keywords (distinct keywords present, as substrings)
+        if self._TOXIC_AUTOMATON is not None:
+            toxic_count = len({keyword for _, keyword in self._TOXIC_AUTOMATON.iter(text_lower)})
+        else:
+            toxic_count = sum(1 for keyword in self.TOXIC_KEYWORDS if keyword in text_lower)
 
         # Calculate toxicity score (0-1)
         toxicity_score = min(1.0, toxic_count * 0.3)
@@ -336,17 +525,11 @@ class SafetyGuardrails:
 
     def _detect_prompt_injection(self, text: str) -> bool:
         """Detect prompt injection attempts."""
-        for pattern in self.INJECTION_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
+        return self._INJECTION_ANY.search(text) is not None
 
     def _detect_jailbreak(self, text: str) -> bool:
         """Detect jailbreak attempts."""
-        for pattern in self.JAILBREAK_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
+        return self._JAILBREAK_ANY.search(text) is not None
 
     def _check_groundedness(self, response: str) -> bool:
         """
@@ -362,22 +545,28 @@ class SafetyGuardrails:
         if len(response) < 20:
             return False
 
-        # Check for obvious errors
-        error_indicators = [
-            "i don't know",
-            "i'm not sure",
-            "i cannot",
-            "error",
-            "failed"
-        ]
+        # Check for obvious errors (no lowercased copy of the response)
+        return self._GROUNDEDNESS_ERROR_ANY.search(response) is None
 
-        response_lower = response.lower()
-        has_errors = any(indicator in response_lower for indicator in error_indicators)
 
-        return not has_errors
+# Convenience functions for easy integration
 
+# SafetyGuardrails instances by config identity. Callers pass the same module-level config
+# dict (e.g. AI_GUARDRAILS_CONFIG) on every query, so each config builds one instance; the
+# entry holds the config itself so its id() can't be reused by another dict.
+_GUARDRAILS_CACHE_SIZE = 8
+_guardrails_cache: Dict[int, tuple] = {}
 
-# Convenience functions for easy integration
+
+def _get_guardrails(config: Optional[Dict] = None) -> SafetyGuardrails:
+    """Get the shared SafetyGuardrails for this config object, creating it on first use."""
+    cached = _guardrails_cache.get(id(config))
+    if cached is None or cached[0] is not config:
+        if len(_guardrails_cache) >= _GUARDRAILS_CACHE_SIZE:
+            _guardrails_cache.clear()
+        cached = (config, SafetyGuardrails(config))
+        _guardrails_cache[id(config)] = cached
+    return cached[1]
 
 def validate_input(
     query: str,
@@ -397,8 +586,7 @@ def validate_input(
     Returns:
         GuardrailResult
     """
-    guardrails = SafetyGuardrails(config)
-    return guardrails.validate_input(query, policies)
+    return _get_guardrails(config).validate_input(query, policies)
 
 
 def validate_output(
@@ -419,8 +607,7 @@ def validate_output(
     Returns:
         GuardrailResult with masked text if applicable
     """
-    guardrails = SafetyGuardrails(config)
-    return guardrails.validate_output(response, policies)
+    return _get_guardrails(config).validate_output(response, policies)
 
 
 def anonymize_pii(text: str) -> str:
@@ -435,5 +622,4 @@ def anonymize_pii(text: str) -> str:
     Returns:
         Text with PII masked as [REDACTED]
     """
-    guardrails = SafetyGuardrails()
-    return guardrails._mask_pii(text)
+    return _get_guardrails()._mask_pii(text)
@@ -5,6 +5,7 @@ This module provides backward-compatible access to configuration loaded from YAM
 All config values are loaded from config/config.yaml instead of root config.py
 """
 
+import functools
 import os
 import yaml
 from pathlib import Path
@@ -111,6 +112,17 @@ COUNTRIES = ['AU', 'US', 'UK', 'IN']
 MLFLOW_PROD_EXPERIMENT_PATH = _get_env_or_config('MLFLOW_EXPERIMENT_PATH', _config['mlflow']['prod_experiment_path'])
 MLFLOW_OFFLINE_EVAL_PATH = _get_env_or_config('MLFLOW_EVAL_PATH', _config['mlflow']['offline_eval_path'])
 
+# Fraction of agent queries wrapped in an MLflow trace span (0.0 disables tracing).
+# MLFLOW_TRACING_ENABLED=0 turns tracing off without editing config.yaml.
+_tracing_config = _config.get('production_monitoring', {}).get('tracing', {})
+MLFLOW_TRACING_ENABLED = str(
+    _get_env_or_config('MLFLOW_TRACING_ENABLED', _tracing_config.get('enabled', True))
+).lower() not in ('0', 'false', 'no')
+MLFLOW_TRACE_SAMPLE_RATE = (
+    float(_get_env_or_config('MLFLOW_TRACE_SAMPLE_RATE', _tracing_config.get('sample_rate', 0.1)))
+    if MLFLOW_TRACING_ENABLED else 0.0
+)
+
 # ============================================================================
 # Brand Configuration
 # ============================================================================
@@ -170,23 +182,29 @@ MLFLOW_MODEL_ALIAS = _config.get('mlflow_serving', {}).get('model_alias', 'champ
 # ============================================================================
 # Helper Functions
 # ============================================================================
+# Table paths are derived from values fixed at import, so each is composed once per process
 
+@functools.lru_cache(maxsize=None)
 def get_table_path(table_name):
     """Get fully qualified table path"""
     return f"{UNITY_CATALOG}.{UNITY_SCHEMA}.{table_name}"
 
+@functools.lru_cache(maxsize=1)
 def get_governance_table_path():
     """Get governance table full path"""
     return get_table_path(GOVERNANCE_TABLE)
 
+@functools.lru_cache(maxsize=1)
 def get_member_profiles_table_path():
     """Get member profiles table full path"""
     return get_table_path(MEMBER_PROFILES_TABLE)
 
+@functools.lru_cache(maxsize=1)
 def get_citation_registry_table_path():
     """Get citation registry table full path"""
     return get_table_path(CITATION_REGISTRY_TABLE)
 
+@functools.lru_cache(maxsize=None)
 def get_functions_path(function_name):
     """Get fully qualified function path"""
     return f"{UNITY_CATALOG}.{FUNCTIONS_SCHEMA}.{function_name}"
@@ -266,6 +284,8 @@ __all__ = [
     'COUNTRIES',
     'MLFLOW_PROD_EXPERIMENT_PATH',
     'MLFLOW_OFFLINE_EVAL_PATH',
+    'MLFLOW_TRACING_ENABLED',
+    'MLFLOW_TRACE_SAMPLE_RATE',
     'BRANDCONFIG',
     'LLM_PRICING',
     'get_table_path',
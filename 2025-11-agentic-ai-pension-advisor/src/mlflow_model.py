@@ -39,11 +39,74 @@ Output Schema:
 
 import mlflow
 import pandas as pd
-from typing import Dict, List, Any, Optional
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows processed concurrently by predict(); each agent_query mostly waits on LLM/SQL endpoints.
+# Override with model_config={"max_workers": N} when logging or loading the model.
+DEFAULT_MAX_WORKERS = 8
+
+# Agent results kept per loaded model for repeated (member, country, query) rows; 0 disables.
+# Override with model_config={"result_cache_size": N}.
+DEFAULT_RESULT_CACHE_SIZE = 10_000
+
+# Seconds a cached answer stays servable: answers are built from the member profile (balance,
+# age), so a long-lived serving process must not keep serving them after it changes.
+# Override with model_config={"result_cache_ttl_s": N}.
+DEFAULT_RESULT_CACHE_TTL_S = 600
+
+
+class _ResultCache:
+    """Thread-safe LRU of agent_query results with a TTL, keyed on a digest of the inputs."""
+
+    def __init__(self, maxsize: int, ttl_s: float = DEFAULT_RESULT_CACHE_TTL_S):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        # key -> (monotonic expiry, result)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(user_id, country, validation_mode, query) -> str:
+        # Answers are personalised from the member profile, so user_id is part of the key;
+        # case and whitespace differences in the query still share an entry
+        normalized_query = " ".join(str(query).split()).casefold()
+        raw = "|".join((str(user_id), str(country), str(validation_mode), normalized_query))
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, result)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
 
 class PensionAdvisorModel(mlflow.pyfunc.PythonModel):
     """
@@ -72,17 +135,24 @@ class PensionAdvisorModel(mlflow.pyfunc.PythonModel):
         if src_dir not in sys.path:
             sys.path.insert(0, src_dir)
 
-        # Import agent processor
+        # Only config here; the agent module graph (SDK, MLflow tracing, prompts) is
+        # imported on the first predict() so it stays out of serving cold-start
         try:
-            from src.agent_processor import agent_query
             from src.config import (
                 AI_GUARDRAILS_ENABLED,
                 validate_configuration
             )
 
-            self.agent_query = agent_query
+            self._agent_query = None
             self.guardrails_enabled = AI_GUARDRAILS_ENABLED
 
+            model_config = getattr(context, 'model_config', None) or {}
+            self.max_workers = int(model_config.get('max_workers', DEFAULT_MAX_WORKERS))
+            self._result_cache = _ResultCache(
+                int(model_config.get('result_cache_size', DEFAULT_RESULT_CACHE_SIZE)),
+                float(model_config.get('result_cache_ttl_s', DEFAULT_RESULT_CACHE_TTL_S))
+            )
+
             # Validate configuration
             config_valid = validate_configuration()
             if not config_valid:
@@ -122,20 +192,108 @@ class PensionAdvisorModel(mlflow.pyfunc.PythonModel):
                 - violations: list of strings
                 - error: string (if any)
         """
-        results = []
-
-        for idx, row in model_input.iterrows():
-            try:
-                # Extract inputs with defaults
-                user_id = row['user_id']
-                session_id = row['session_id']
-                country = row['country']
-                query = row['query']
-                validation_mode = row.get('validation_mode', 'llm_judge')
-                enable_observability = row.get('enable_observability', False)
+        # Plain dicts per row: iterrows() would build a pandas Series for every row
+        rows = model_input.to_dict('records')
+        if not rows:
+            return pd.DataFrame()
+
+        self._ensure_agent()
+        cache = self._get_result_cache()
+        hits_before, misses_before = cache.hits, cache.misses
+
+        # Rows with enable_observability call mlflow.start_run, whose active-run stack is
+        # process-global on older MLflow, so those run serially; the rest are independent
+        # and I/O-bound, so fan them out. Results are slotted back in input order.
+        results = [None] * len(rows)
+        pooled = []
+        for idx, row in enumerate(rows):
+            if row.get('enable_observability', False):
+                results[idx] = self._predict_row(idx, row)
+            else:
+                pooled.append(idx)
+
+        max_workers = min(getattr(self, 'max_workers', DEFAULT_MAX_WORKERS), len(pooled))
+        if max_workers <= 1:
+            for idx in pooled:
+                results[idx] = self._predict_row(idx, rows[idx])
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PensionAdvisor-Predict") as executor:
+                pooled_results = executor.map(self._predict_row, pooled, [rows[idx] for idx in pooled])
+                for idx, result in zip(pooled, pooled_results):
+                    results[idx] = result
+
+        # One summary per batch instead of a log record per failed row; details are in 'error'
+        error_rows = [idx for idx, result in enumerate(results) if result['error']]
+        if error_rows:
+            first = error_rows[0]
+            logger.warning(
+                "%d/%d rows errored (first: row %d: %s)",
+                len(error_rows), len(rows), first, results[first]['error']
+            )
+
+        batch_hits = cache.hits - hits_before
+        batch_lookups = batch_hits + cache.misses - misses_before
+        if batch_lookups:
+            hit_rate = batch_hits / batch_lookups
+            logger.info("Result cache: %d/%d hits (%.0f%%)", batch_hits, batch_lookups, hit_rate * 100)
+            if mlflow.active_run():
+                mlflow.log_metrics({
+                    'predict.cache_hits': batch_hits,
+                    'predict.cache_hit_rate': hit_rate
+                })
+
+        return pd.DataFrame(results)
 
+    def _ensure_agent(self):
+        """Import agent_processor.agent_query on first use and keep a reference to it."""
+        if getattr(self, '_agent_query', None) is None:
+            from src.agent_processor import agent_query, log_cached_answer
+            self._log_cached_answer = log_cached_answer
+            self._agent_query = agent_query
+        return self._agent_query
+
+    def _get_result_cache(self) -> _ResultCache:
+        """Return the model's result cache, creating it if load_context() was not called."""
+        cache = getattr(self, '_result_cache', None)
+        if cache is None:
+            cache = self._result_cache = _ResultCache(DEFAULT_RESULT_CACHE_SIZE)
+        return cache
+
+    def _predict_row(self, idx: int, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one input row through the agent, returning an error row instead of raising."""
+        try:
+            # Extract inputs with defaults
+            user_id = row['user_id']
+            session_id = row['session_id']
+            country = row['country']
+            query = row['query']
+            validation_mode = row.get('validation_mode', 'llm_judge')
+            enable_observability = row.get('enable_observability', False)
+
+            # Repeated queries skip the agent (and its LLM calls); the hit is still audited
+            lookup_start = time.perf_counter()
+            cache = self._get_result_cache()
+            cache_key = cache.make_key(user_id, country, validation_mode, query)
+            result = cache.get(cache_key) if cache.maxsize > 0 else None
+
+            if result is not None:
+                self._log_cached_answer(
+                    user_id=user_id,
+                    session_id=session_id,
+                    country=country,
+                    query_string=query,
+                    result=result,
+                    elapsed=time.perf_counter() - lookup_start
+                )
+                # No LLM spend happened for this row: report zero cost and the lookup's own latency
+                result = {
+                    **result,
+                    'cost': 0.0,
+                    'latency_ms': (time.perf_counter() - lookup_start) * 1000
+                }
+            else:
                 # Process query through agent
-                result = self.agent_query(
+                result = self._agent_query(
                     user_id=user_id,
                     session_id=session_id,
                     country=country,
@@ -143,40 +301,38 @@ class PensionAdvisorModel(mlflow.pyfunc.PythonModel):
                     validation_mode=validation_mode,
                     enable_observability=enable_observability
                 )
+                if not result.get('error'):
+                    cache.put(cache_key, result)
+
+            # Format result
+            return {
+                'user_id': user_id,
+                'session_id': session_id,
+                'query': query,
+                'answer': result.get('answer', None),
+                'evidence': result.get('evidence', []),
+                'cost': result.get('cost', 0.0),
+                'latency_ms': result.get('latency_ms', 0.0),
+                'blocked': result.get('blocked', False),
+                'violations': result.get('violations', []),
+                'error': result.get('error', None)
+            }
 
-                # Format result
-                formatted_result = {
-                    'user_id': user_id,
-                    'session_id': session_id,
-                    'query': query,
-                    'answer': result.get('answer', None),
-                    'evidence': result.get('evidence', []),
-                    'cost': result.get('cost', 0.0),
-                    'latency_ms': result.get('latency_ms', 0.0),
-                    'blocked': result.get('blocked', False),
-                    'violations': result.get('violations', []),
-                    'error': result.get('error', None)
-                }
-
-                results.append(formatted_result)
-
-            except Exception as e:
-                logger.error(f"Error processing row {idx}: {str(e)}")
-                # Add error result
-                results.append({
-                    'user_id': row.get('user_id', 'unknown'),
-                    'session_id': row.get('session_id', 'unknown'),
-                    'query': row.get('query', ''),
-                    'answer': None,
-                    'evidence': [],
-                    'cost': 0.0,
-                    'latency_ms': 0.0,
-                    'blocked': False,
-                    'violations': [],
-                    'error': str(e)
-                })
-
-        return pd.DataFrame(results)
+        except Exception as e:
+            logger.debug("Error processing row %d: %s", idx, e)
+            # Add error result
+            return {
+                'user_id': row.get('user_id', 'unknown'),
+                'session_id': row.get('session_id', 'unknown'),
+                'query': row.get('query', ''),
+                'answer': None,
+                'evidence': [],
+                'cost': 0.0,
+                'latency_ms': 0.0,
+                'blocked': False,
+                'violations': [],
+                'error': str(e)
+            }
 
 
 def log_model_to_mlflow(
@@ -379,6 +535,40 @@ def run_batch_inference(
     return predictions
 
 
+# Output table layout for run_batch_inference_from_table; nested values are stored as JSON text
+PREDICTION_TABLE_SCHEMA = (
+    "user_id STRING, session_id STRING, query STRING, answer STRING, evidence STRING, "
+    "cost DOUBLE, latency_ms DOUBLE, blocked BOOLEAN, violations ARRAY<STRING>, error STRING"
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_model_for_worker(model_uri: str) -> Any:
+    """Load the registry model once per Python worker process."""
+    return mlflow.pyfunc.load_model(model_uri)
+
+
+def _predict_partitions(model_uri: str):
+    """Build the mapInPandas function that scores each Arrow batch with the registry model."""
+    def predict_batches(batches):
+        model = _load_model_for_worker(model_uri)
+        for batch in batches:
+            predictions = model.predict(batch)
+            if predictions.empty:
+                continue
+            predictions['evidence'] = predictions['evidence'].map(lambda value: json.dumps(value, default=str))
+            predictions['violations'] = predictions['violations'].map(
+                lambda values: [v if isinstance(v, str) else json.dumps(v, default=str) for v in values or []]
+            )
+            yield predictions
+
+        # Spark Python workers exit via os._exit, so the agent's atexit hooks never run here:
+        # finish Phase 8 logging and write the queued governance rows before the task ends
+        from src.agent_processor import wait_for_pending_logging
+        wait_for_pending_logging()
+    return predict_batches
+
+
 def run_batch_inference_from_table(
     input_table: str,
     output_table: str,
@@ -390,6 +580,11 @@ def run_batch_inference_from_table(
     """
     Run batch inference from a Delta table and save to output table.
 
+    Rows are scored on the executors with mapInPandas, so the input is never
+    collected to the driver. Each executor Python worker loads the model from
+    the registry once; executors need Databricks credentials in their
+    environment (as the agent does for its own SQL/LLM calls).
+
     Args:
         input_table: Fully qualified input table name (e.g., "catalog.schema.queries")
         output_table: Fully qualified output table name (e.g., "catalog.schema.predictions")
@@ -409,19 +604,16 @@ def run_batch_inference_from_table(
         schema = UNITY_SCHEMA
 
     spark = SparkSession.builder.getOrCreate()
+    model_uri = f"models:/{catalog}.{schema}.{model_name}@{alias}"
 
-    # Read input table
-    logger.info(f"Reading from {input_table}...")
-    input_df = spark.table(input_table).toPandas()
-
-    # Run inference
-    predictions_df = run_batch_inference(input_df, model_name, catalog, schema, alias)
-
-    # Convert back to Spark DataFrame and save
-    logger.info(f"Writing to {output_table}...")
-    predictions_spark = spark.createDataFrame(predictions_df)
+    # Score and write in one distributed job
+    logger.info(f"Scoring {input_table} with {model_uri}...")
+    predictions_spark = spark.table(input_table).mapInPandas(
+        _predict_partitions(model_uri),
+        schema=PREDICTION_TABLE_SCHEMA
+    )
     predictions_spark.write.format("delta").mode("overwrite").saveAsTable(output_table)
 
     logger.info(f"✅ Batch inference complete")
-    logger.info(f"   Input: {len(input_df)} rows from {input_table}")
-    logger.info(f"   Output: {len(predictions_df)} rows to {output_table}")
+    logger.info(f"   Input: {input_table}")
+    logger.info(f"   Output: {output_table}")
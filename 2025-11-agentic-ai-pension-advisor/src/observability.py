@@ -150,31 +150,7 @@ class AgentObservability:
         Args:
             result: Classification result from cascade classifier
         """
-        if not self.enable_mlflow or not self.current_run:
-            return
-        
-        try:
-            self.run_metrics['classification'] = result
-            
-            mlflow.log_metric("classification.is_on_topic", 1.0 if result.get('is_on_topic') else 0.0)
-            mlflow.log_metric("classification.confidence", result.get('confidence', 0.0))
-            mlflow.log_metric("classification.latency_ms", result.get('latency_ms', 0.0))
-            mlflow.log_metric("classification.cost_usd", result.get('cost_usd', 0.0))
-            
-            mlflow.log_param("classification.method", result.get('method', 'unknown'))
-            mlflow.log_param("classification.result", result.get('classification', 'unknown'))
-            
-            # Log stage used (for monitoring stage distribution)
-            method = result.get('method', 'unknown')
-            if 'regex' in method:
-                mlflow.log_metric("classification.stage", 1)
-            elif 'embedding' in method:
-                mlflow.log_metric("classification.stage", 2)
-            elif 'llm' in method:
-                mlflow.log_metric("classification.stage", 3)
-            
-        except Exception as e:
-            logger.info(f"⚠️ Error logging classification: {e}")
+        self.log_stage_results(classification=result)
     
     def log_tool_execution(self, tools_used: List[str], tool_results: Dict):
         """
@@ -184,33 +160,7 @@ class AgentObservability:
             tools_used: List of tools called
             tool_results: Dictionary of tool results
         """
-        if not self.enable_mlflow or not self.current_run:
-            return
-        
-        try:
-            self.run_metrics['tools'] = {
-                'tools_used': tools_used,
-                'tools_count': len(tools_used)
-            }
-            
-            mlflow.log_metric("tools.count", len(tools_used))
-            mlflow.log_param("tools.used", ",".join(tools_used) if tools_used else "none")
-            
-            # Log tool success/failure
-            failed_tools = [
-                name for name, result in tool_results.items()
-                if isinstance(result, dict) and 'error' in result
-            ]
-            
-            mlflow.log_metric("tools.failed_count", len(failed_tools))
-            mlflow.log_metric("tools.success_rate", 
-                            (len(tools_used) - len(failed_tools)) / len(tools_used) if tools_used else 1.0)
-            
-            if failed_tools:
-                mlflow.log_param("tools.failures", ",".join(failed_tools))
-            
-        except Exception as e:
-            logger.info(f"⚠️ Error logging tool execution: {e}")
+        self.log_stage_results(tools_used=tools_used, tool_results=tool_results)
     
     def log_synthesis(self, synthesis_results: List[Dict]):
         """
@@ -219,36 +169,7 @@ class AgentObservability:
         Args:
             synthesis_results: List of synthesis attempt results
         """
-        if not self.enable_mlflow or not self.current_run:
-            return
-        
-        try:
-            total_input_tokens = sum(s.get('input_tokens', 0) for s in synthesis_results)
-            total_output_tokens = sum(s.get('output_tokens', 0) for s in synthesis_results)
-            total_cost = sum(s.get('cost', 0.0) for s in synthesis_results)
-            total_duration = sum(s.get('duration', 0.0) for s in synthesis_results)
-            
-            self.run_metrics['synthesis'] = {
-                'attempts': len(synthesis_results),
-                'input_tokens': total_input_tokens,
-                'output_tokens': total_output_tokens,
-                'total_tokens': total_input_tokens + total_output_tokens,
-                'cost': total_cost,
-                'duration': total_duration
-            }
-            
-            mlflow.log_metric("synthesis.attempts", len(synthesis_results))
-            mlflow.log_metric("synthesis.input_tokens", total_input_tokens)
-            mlflow.log_metric("synthesis.output_tokens", total_output_tokens)
-            mlflow.log_metric("synthesis.total_tokens", total_input_tokens + total_output_tokens)
-            mlflow.log_metric("synthesis.cost_usd", total_cost)
-            mlflow.log_metric("synthesis.duration_sec", total_duration)
-            
-            if synthesis_results:
-                mlflow.log_param("synthesis.model", synthesis_results[0].get('model', 'unknown'))
-            
-        except Exception as e:
-            logger.info(f"⚠️ Error logging synthesis: {e}")
+        self.log_stage_results(synthesis_results=synthesis_results)
     
     def log_validation(self, validation_results: List[Dict]):
         """
@@ -257,57 +178,175 @@ class AgentObservability:
         Args:
             validation_results: List of validation attempt results
         """
+        self.log_stage_results(validation_results=validation_results)
+    
+    def log_stage_results(self,
+                          classification: Optional[Dict] = None,
+                          tools_used: Optional[List[str]] = None,
+                          tool_results: Optional[Dict] = None,
+                          synthesis_results: Optional[List[Dict]] = None,
+                          validation_results: Optional[List[Dict]] = None):
+        """
+        Log classification, tool, synthesis and validation metrics in one batch.
+        
+        Stages left as None are skipped. All metrics go out in one log_metrics call and
+        all params in one log_params call, instead of a tracking request per value.
+        Each stage is collected on its own, so a malformed stage only loses its own values.
+        
+        Args:
+            classification: Classification result from cascade classifier
+            tools_used: List of tools called
+            tool_results: Dictionary of tool results
+            synthesis_results: List of synthesis attempt results
+            validation_results: List of validation attempt results
+        """
         if not self.enable_mlflow or not self.current_run:
             return
         
+        metrics = {}
+        params = {}
+        final_validation = None
+        
+        try:
+            if classification is not None:
+                self.run_metrics['classification'] = classification
+                
+                metrics["classification.is_on_topic"] = 1.0 if classification.get('is_on_topic') else 0.0
+                metrics["classification.confidence"] = classification.get('confidence', 0.0)
+                metrics["classification.latency_ms"] = classification.get('latency_ms', 0.0)
+                metrics["classification.cost_usd"] = classification.get('cost_usd', 0.0)
+                
+                params["classification.method"] = classification.get('method', 'unknown')
+                params["classification.result"] = classification.get('classification', 'unknown')
+                
+                # Log stage used (for monitoring stage distribution)
+                method = classification.get('method', 'unknown')
+                if 'regex' in method:
+                    metrics["classification.stage"] = 1
+                elif 'embedding' in method:
+                    metrics["classification.stage"] = 2
+                elif 'llm' in method:
+                    metrics["classification.stage"] = 3
+        except Exception as e:
+            logger.info(f"⚠️ Error collecting classification stage results: {e}")
+        
+        try:
+            if tools_used is not None:
+                self.run_metrics['tools'] = {
+                    'tools_used': tools_used,
+                    'tools_count': len(tools_used)
+                }
+                
+                metrics["tools.count"] = len(tools_used)
+                params["tools.used"] = ",".join(tools_used) if tools_used else "none"
+                
+                # Log tool success/failure
+                failed_tools = [
+                    name for name, result in (tool_results or {}).items()
+                    if isinstance(result, dict) and 'error' in result
+                ]
+                
+                metrics["tools.failed_count"] = len(failed_tools)
+                metrics["tools.success_rate"] = (
+                    (len(tools_used) - len(failed_tools)) / len(tools_used) if tools_used else 1.0
+                )
+                
+                if failed_tools:
+                    params["tools.failures"] = ",".join(failed_tools)
+        except Exception as e:
+            logger.info(f"⚠️ Error collecting tools stage results: {e}")
+        
+        try:
+            if synthesis_results is not None:
+                total_input_tokens = sum(s.get('input_tokens', 0) for s in synthesis_results)
+                total_output_tokens = sum(s.get('output_tokens', 0) for s in synthesis_results)
+                total_cost = sum(s.get('cost', 0.0) for s in synthesis_results)
+                total_duration = sum(s.get('duration', 0.0) for s in synthesis_results)
+                
+                self.run_metrics['synthesis'] = {
+                    'attempts': len(synthesis_results),
+                    'input_tokens': total_input_tokens,
+                    'output_tokens': total_output_tokens,
+                    'total_tokens': total_input_tokens + total_output_tokens,
+                    'cost': total_cost,
+                    'duration': total_duration
+                }
+                
+                metrics["synthesis.attempts"] = len(synthesis_results)
+                metrics["synthesis.input_tokens"] = total_input_tokens
+                metrics["synthesis.output_tokens"] = total_output_tokens
+                metrics["synthesis.total_tokens"] = total_input_tokens + total_output_tokens
+                metrics["synthesis.cost_usd"] = total_cost
+                metrics["synthesis.duration_sec"] = total_duration
+                
+                if synthesis_results:
+                    params["synthesis.model"] = synthesis_results[0].get('model', 'unknown')
+        except Exception as e:
+            logger.info(f"⚠️ Error collecting synthesis stage results: {e}")
+        
         try:
-            if not validation_results:
-                return
-            
-            final_validation = validation_results[-1]
-            
-            total_input_tokens = sum(v.get('input_tokens', 0) for v in validation_results)
-            total_output_tokens = sum(v.get('output_tokens', 0) for v in validation_results)
-            total_cost = sum(v.get('cost', 0.0) for v in validation_results)
-            total_duration = sum(v.get('duration', 0.0) for v in validation_results)
-            
-            self.run_metrics['validation'] = {
-                'attempts': len(validation_results),
-                'passed': final_validation.get('passed', False),
-                'confidence': final_validation.get('confidence', 0.0),
-                'input_tokens': total_input_tokens,
-                'output_tokens': total_output_tokens,
-                'total_tokens': total_input_tokens + total_output_tokens,
-                'cost': total_cost,
-                'duration': total_duration
-            }
-            
-            mlflow.log_metric("validation.attempts", len(validation_results))
-            mlflow.log_metric("validation.passed", 1.0 if final_validation.get('passed') else 0.0)
-            mlflow.log_metric("validation.confidence", final_validation.get('confidence', 0.0))
-            mlflow.log_metric("validation.input_tokens", total_input_tokens)
-            mlflow.log_metric("validation.output_tokens", total_output_tokens)
-            mlflow.log_metric("validation.total_tokens", total_input_tokens + total_output_tokens)
-            mlflow.log_metric("validation.cost_usd", total_cost)
-            mlflow.log_metric("validation.duration_sec", total_duration)
-            
-            # Log violations
-            violations = final_validation.get('violations', [])
-            mlflow.log_metric("validation.violations_count", len(violations))
-            
             if validation_results:
-                mlflow.log_param("validation.model", validation_results[0].get('model', 'unknown'))
+                final_validation = validation_results[-1]
+                
+                total_input_tokens = sum(v.get('input_tokens', 0) for v in validation_results)
+                total_output_tokens = sum(v.get('output_tokens', 0) for v in validation_results)
+                total_cost = sum(v.get('cost', 0.0) for v in validation_results)
+                total_duration = sum(v.get('duration', 0.0) for v in validation_results)
+                
+                self.run_metrics['validation'] = {
+                    'attempts': len(validation_results),
+                    'passed': final_validation.get('passed', False),
+                    'confidence': final_validation.get('confidence', 0.0),
+                    'input_tokens': total_input_tokens,
+                    'output_tokens': total_output_tokens,
+                    'total_tokens': total_input_tokens + total_output_tokens,
+                    'cost': total_cost,
+                    'duration': total_duration
+                }
+                
+                metrics["validation.attempts"] = len(validation_results)
+                metrics["validation.passed"] = 1.0 if final_validation.get('passed') else 0.0
+                metrics["validation.confidence"] = final_validation.get('confidence', 0.0)
+                metrics["validation.input_tokens"] = total_input_tokens
+                metrics["validation.output_tokens"] = total_output_tokens
+                metrics["validation.total_tokens"] = total_input_tokens + total_output_tokens
+                metrics["validation.cost_usd"] = total_cost
+                metrics["validation.duration_sec"] = total_duration
+                
+                # Log violations
+                metrics["validation.violations_count"] = len(final_validation.get('violations', []))
+                
+                params["validation.model"] = validation_results[0].get('model', 'unknown')
+        except Exception as e:
+            logger.info(f"⚠️ Error collecting validation stage results: {e}")
+        
+        # Drop values MLflow can't take as metrics (e.g. a None confidence), not the whole batch
+        numeric_metrics = {}
+        for key, value in metrics.items():
+            try:
+                numeric_metrics[key] = float(value)
+            except (TypeError, ValueError):
+                logger.info(f"⚠️ Skipping non-numeric metric {key}={value!r}")
+        params = {key: value for key, value in params.items() if value is not None}
+        
+        try:
+            if numeric_metrics:
+                mlflow.log_metrics(numeric_metrics)
+            if params:
+                mlflow.log_params(params)
             
             # Log validation details as artifact
-            mlflow.log_dict(final_validation, "validation_result.json")
+            if final_validation is not None:
+                mlflow.log_dict(final_validation, "validation_result.json")
             
         except Exception as e:
-            logger.info(f"⚠️ Error logging validation: {e}")
+            logger.info(f"⚠️ Error logging stage results: {e}")
     
     def end_agent_run(self,
                      response: str,
                      success: bool = True,
-                     error: Optional[str] = None):
+                     error: Optional[str] = None,
+                     log_summary: bool = True):
         """
         End the current MLflow run and log final metrics.
 
@@ -315,6 +354,8 @@ class AgentObservability:
             response: Final response text
             success: Whether the query was successful
             error: Error message if failed
+            log_summary: Upload metrics_summary.json now; pass False to upload it later
+                with log_metrics_summary() (e.g. from a background thread)
         """
         if not self.enable_mlflow:
             return
@@ -342,24 +383,28 @@ class AgentObservability:
                 self.run_metrics.get('validation', {}).get('total_tokens', 0)
             )
             
-            # Log totals
-            mlflow.log_metric("total.duration_sec", elapsed)
-            mlflow.log_metric("total.cost_usd", total_cost)
-            mlflow.log_metric("total.tokens", total_tokens)
-            mlflow.log_metric("total.success", 1.0 if success else 0.0)
-            mlflow.log_metric("response.length", len(response))
+            # Log totals (one batched request)
+            mlflow.log_metrics({
+                "total.duration_sec": elapsed,
+                "total.cost_usd": total_cost,
+                "total.tokens": total_tokens,
+                "total.success": 1.0 if success else 0.0,
+                "response.length": len(response)
+            })
             
             # Log status
-            mlflow.set_tag("status", "success" if success else "failed")
+            status_tags = {"status": "success" if success else "failed"}
             if error:
-                mlflow.set_tag("error", error)
+                status_tags["error"] = error
+            mlflow.set_tags(status_tags)
             
-            # Log response as artifact (truncated)
+            # Log response as artifact (truncated) - the scoring job reads it once the run is FINISHED
             response_truncated = response[:5000] if len(response) > 5000 else response
             mlflow.log_text(response_truncated, "response.txt")
             
             # Log full metrics as JSON
-            mlflow.log_dict(self.run_metrics, "metrics_summary.json")
+            if log_summary:
+                mlflow.log_dict(self.run_metrics, "metrics_summary.json")
             
             # End run
             mlflow.end_run()
@@ -374,6 +419,25 @@ class AgentObservability:
             except:
                 pass
     
+    def log_metrics_summary(self, run_id: str, run_metrics: Dict):
+        """
+        Upload metrics_summary.json to a run by ID.
+
+        Uses MlflowClient rather than the fluent API, so it works from any thread
+        and after the run has ended.
+
+        Args:
+            run_id: MLflow run ID
+            run_metrics: The run's metrics dict (AgentObservability.run_metrics)
+        """
+        if not self.enable_mlflow or not run_id:
+            return
+
+        try:
+            mlflow.MlflowClient().log_dict(run_id, run_metrics, "metrics_summary.json")
+        except Exception as e:
+            logger.info(f"⚠️ Error logging metrics summary: {e}")
+    
     # ========== LAKEHOUSE MONITORING ==========
     
     def setup_lakehouse_monitoring(self, 
@@ -5,7 +5,7 @@ This module provides automated quality assessment scorers that run
 asynchronously in the background to evaluate production queries.
 
 Scorers:
-- Built-in: relevance, faithfulness, toxicity
+- Built-in: relevance, faithfulness (one combined LLM judge call), toxicity
 - Custom: country_compliance, citation_quality
 
 Usage:
@@ -19,15 +19,108 @@ Usage:
     )
 """
 
+import functools
+import hashlib
+import json
+import orjson
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from databricks.sdk import WorkspaceClient
 from databricks.sdk.service.serving import ChatMessage, ChatMessageRole
 from src.config import JUDGE_LLM_ENDPOINT
+from src.shared.databricks_client import get_client
 from src.shared.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Aho-Corasick finds every keyword in one pass over the text (pyahocorasick, optional)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+def _build_keyword_automaton(keywords: Dict[str, Any]):
+    """Build an automaton mapping each (lowercase) keyword to its value, or None without pyahocorasick."""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword, value in keywords.items():
+        automaton.add_word(keyword, value)
+    automaton.make_automaton()
+    return automaton
+
+
+def _matched_keywords(automaton, keywords: Dict[str, Any], text_lower: str) -> set:
+    """Values of the distinct keywords occurring (as substrings) in text_lower."""
+    if automaton is not None:
+        return {value for _, value in automaton.iter(text_lower)}
+    return {value for keyword, value in keywords.items() if keyword in text_lower}
+
+# Parsed judge verdicts by prompt digest: re-scoring the same (query, response, context),
+# as in replays and regression runs, skips the endpoint call entirely
+JUDGE_CACHE_MAX_ENTRIES = 4096
+_judge_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_judge_cache_lock = threading.Lock()
+
+
+def _truncated_repr(obj: Any, limit: int = 500) -> str:
+    """
+    First `limit` characters of obj as JSON, encoding lazily.
+
+    Judge prompts only show a short excerpt of context/tool output, so stop
+    encoding once enough text exists instead of rendering the whole object.
+    """
+    parts = []
+    size = 0
+    try:
+        for chunk in json.JSONEncoder(default=str).iterencode(obj):
+            parts.append(chunk)
+            size += len(chunk)
+            if size >= limit:
+                break
+    except (TypeError, ValueError):
+        # e.g. non-string dict keys
+        return str(obj)[:limit]
+    return ''.join(parts)[:limit]
+
+
+# Judges sometimes wrap their JSON in a markdown code fence
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+
+def _query_judge_json(w: WorkspaceClient, endpoint: str, prompt: str, max_tokens: int) -> Dict[str, Any]:
+    """Send a judge prompt and parse its JSON reply, reusing the cached verdict for a repeated prompt."""
+    key = hashlib.sha256(f"{endpoint}|{max_tokens}|{prompt}".encode()).hexdigest()
+    with _judge_cache_lock:
+        cached = _judge_cache.get(key)
+        if cached is not None:
+            _judge_cache.move_to_end(key)
+            return cached
+
+    messages = [ChatMessage(role=ChatMessageRole.USER, content=prompt)]
+    response_obj = w.serving_endpoints.query(
+        name=endpoint,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=0.1
+    )
+
+    result_text = response_obj.choices[0].message.content
+
+    # Parse JSON (only parsed verdicts are cached, so a malformed reply is retried next time)
+    result = orjson.loads(_FENCE_RE.sub('', result_text))
+
+    with _judge_cache_lock:
+        _judge_cache[key] = result
+        if len(_judge_cache) > JUDGE_CACHE_MAX_ENTRIES:
+            _judge_cache.popitem(last=False)
+    return result
+
 
 class RelevanceScorer:
     """
@@ -36,8 +129,10 @@ class RelevanceScorer:
     Uses LLM to judge relevance on a scale of 0-1.
     """
 
+    __slots__ = ("w", "llm_endpoint", "name")
+
     def __init__(self, llm_endpoint: str = None):
-        self.w = WorkspaceClient()
+        self.w = get_client()
         self.llm_endpoint = llm_endpoint or JUDGE_LLM_ENDPOINT
         self.name = "relevance"
 
@@ -55,7 +150,7 @@ Evaluate:
 2. Is the information provided relevant to what was asked?
 3. Does it stay on topic?
 
-Respond with JSON:
+Respond with ONLY this JSON object (no prose, no code fences; keep reasoning to one sentence):
 {{
     "score": <0.0 to 1.0>,
     "passed": <true/false>,
@@ -66,19 +161,7 @@ Score 1.0 = perfectly relevant, 0.0 = completely irrelevant
 Pass if score >= 0.7"""
 
         try:
-            messages = [ChatMessage(role=ChatMessageRole.USER, content=prompt)]
-            response_obj = self.w.serving_endpoints.query(
-                name=self.llm_endpoint,
-                messages=messages,
-                max_tokens=300,
-                temperature=0.1
-            )
-
-            result_text = response_obj.choices[0].message.content
-
-            # Parse JSON
-            import json
-            result = json.loads(result_text)
+            result = _query_judge_json(self.w, self.llm_endpoint, prompt, max_tokens=150)
 
             return {
                 'scorer': self.name,
@@ -108,16 +191,18 @@ class FaithfulnessScorer:
     Checks if response makes claims not supported by context.
     """
 
+    __slots__ = ("w", "llm_endpoint", "name")
+
     def __init__(self, llm_endpoint: str = None):
-        self.w = WorkspaceClient()
+        self.w = get_client()
         self.llm_endpoint = llm_endpoint or JUDGE_LLM_ENDPOINT
         self.name = "faithfulness"
 
     def score(self, query: str, response: str, context: Dict = None, tool_output: Dict = None, **kwargs) -> Dict[str, Any]:
         """Score faithfulness/groundedness of response."""
 
-        context_str = str(context) if context else "No context provided"
-        tools_str = str(tool_output) if tool_output else "No tool outputs"
+        context_str = _truncated_repr(context) if context else "No context provided"
+        tools_str = _truncated_repr(tool_output) if tool_output else "No tool outputs"
 
         prompt = f"""You are evaluating if a response is grounded in the provided context and tool outputs.
 
@@ -134,7 +219,7 @@ Evaluate:
 2. Are there any unsupported claims or hallucinations?
 3. Is all factual information grounded in the provided data?
 
-Respond with JSON:
+Respond with ONLY this JSON object (no prose, no code fences; keep reasoning to one sentence):
 {{
     "score": <0.0 to 1.0>,
     "passed": <true/false>,
@@ -145,19 +230,7 @@ Score 1.0 = fully grounded, 0.0 = completely ungrounded
 Pass if score >= 0.8"""
 
         try:
-            messages = [ChatMessage(role=ChatMessageRole.USER, content=prompt)]
-            response_obj = self.w.serving_endpoints.query(
-                name=self.llm_endpoint,
-                messages=messages,
-                max_tokens=300,
-                temperature=0.1
-            )
-
-            result_text = response_obj.choices[0].message.content
-
-            # Parse JSON
-            import json
-            result = json.loads(result_text)
+            result = _query_judge_json(self.w, self.llm_endpoint, prompt, max_tokens=150)
 
             return {
                 'scorer': self.name,
@@ -180,6 +253,97 @@ Pass if score >= 0.8"""
             }
 
 
+class CombinedJudgeScorer:
+    """
+    Scores relevance and faithfulness with a single LLM judge call.
+
+    Both rubrics go into one prompt and the judge returns one JSON object per
+    dimension, halving judge round-trips compared with running RelevanceScorer
+    and FaithfulnessScorer separately. Results are reported under each
+    dimension's own scorer name.
+    """
+
+    __slots__ = ("w", "llm_endpoint", "name", "scorer_names")
+
+    def __init__(self, llm_endpoint: str = None):
+        self.w = get_client()
+        self.llm_endpoint = llm_endpoint or JUDGE_LLM_ENDPOINT
+        self.name = "llm_judge"
+        self.scorer_names = ("relevance", "faithfulness")
+
+    def score(self, query: str, response: str, context: Dict = None, tool_output: Dict = None, **kwargs) -> Dict[str, Dict[str, Any]]:
+        """Score relevance and faithfulness of response; returns results keyed by scorer name."""
+
+        context_str = _truncated_repr(context) if context else "No context provided"
+        tools_str = _truncated_repr(tool_output) if tool_output else "No tool outputs"
+
+        prompt = f"""You are evaluating a response on two dimensions: relevance to the user's query, and grounding in the provided context and tool outputs.
+
+Query: {query}
+
+Response: {response}
+
+Context Available: {context_str[:500]}...
+
+Tool Outputs: {tools_str[:500]}...
+
+Relevance - evaluate:
+1. Does the response directly address the query?
+2. Is the information provided relevant to what was asked?
+3. Does it stay on topic?
+Score 1.0 = perfectly relevant, 0.0 = completely irrelevant. Pass if score >= 0.7
+
+Faithfulness - evaluate:
+1. Does the response only use information from context/tools?
+2. Are there any unsupported claims or hallucinations?
+3. Is all factual information grounded in the provided data?
+Score 1.0 = fully grounded, 0.0 = completely ungrounded. Pass if score >= 0.8
+
+Respond with ONLY this JSON object (no prose, no code fences; keep reasoning to one sentence):
+{{
+    "relevance": {{
+        "score": <0.0 to 1.0>,
+        "passed": <true/false>,
+        "reasoning": "<brief explanation>"
+    }},
+    "faithfulness": {{
+        "score": <0.0 to 1.0>,
+        "passed": <true/false>,
+        "reasoning": "<brief explanation>"
+    }}
+}}"""
+
+        try:
+            result = _query_judge_json(self.w, self.llm_endpoint, prompt, max_tokens=250)
+
+            scores = {}
+            for name in self.scorer_names:
+                dimension = result.get(name) or {}
+                scores[name] = {
+                    'scorer': name,
+                    'score': dimension.get('score', 0.0),
+                    'passed': dimension.get('passed', False),
+                    'confidence': dimension.get('score', 0.0),
+                    'reasoning': dimension.get('reasoning', ''),
+                    'verdict': 'PASS' if dimension.get('passed') else 'FAIL'
+                }
+            return scores
+
+        except Exception as e:
+            logger.error(f"Combined judge scorer error: {e}")
+            return {
+                name: {
+                    'scorer': name,
+                    'score': 0.5,
+                    'passed': True,  # Default to pass on error
+                    'confidence': 0.0,
+                    'reasoning': f'Error: {str(e)}',
+                    'verdict': 'ERROR'
+                }
+                for name in self.scorer_names
+            }
+
+
 class ToxicityScorer:
     """
     Scores if the response contains toxic, offensive, or inappropriate content.
@@ -187,20 +351,25 @@ class ToxicityScorer:
     Uses keyword matching and pattern detection.
     """
 
+    __slots__ = ("name", "toxic_keywords", "_toxic_keywords", "_toxic_automaton")
+
     def __init__(self):
         self.name = "toxicity"
         self.toxic_keywords = [
             'stupid', 'idiot', 'moron', 'dumb', 'hate', 'damn',
             'shit', 'fuck', 'ass', 'bastard', 'bitch'
         ]
+        self._toxic_keywords = {keyword: keyword for keyword in self.toxic_keywords}
+        self._toxic_automaton = _build_keyword_automaton(self._toxic_keywords)
 
-    def score(self, query: str, response: str, **kwargs) -> Dict[str, Any]:
+    def score(self, query: str, response: str, response_lower: str = None, **kwargs) -> Dict[str, Any]:
         """Score toxicity of response."""
 
-        response_lower = response.lower()
+        if response_lower is None:
+            response_lower = response.lower()
 
-        # Count toxic keywords
-        toxic_count = sum(1 for keyword in self.toxic_keywords if keyword in response_lower)
+        # Count toxic keywords (distinct keywords present, in one pass)
+        toxic_count = len(_matched_keywords(self._toxic_automaton, self._toxic_keywords, response_lower))
 
         # Calculate score (inverse - 1.0 = no toxicity, 0.0 = highly toxic)
         toxicity_level = min(1.0, toxic_count * 0.3)
@@ -225,6 +394,8 @@ class CountryComplianceScorer:
     Checks if response mentions appropriate country-specific terms.
     """
 
+    __slots__ = ("name", "compliance_rules", "_country_keywords", "_country_automata")
+
     def __init__(self):
         self.name = "country_compliance"
         self.compliance_rules = {
@@ -250,24 +421,33 @@ class CountryComplianceScorer:
             }
         }
 
-    def score(self, query: str, response: str, country: str = 'AU', **kwargs) -> Dict[str, Any]:
+        # Per country: concepts and key ages in one keyword table, matched in a single pass
+        self._country_keywords = {}
+        self._country_automata = {}
+        for code, rules in self.compliance_rules.items():
+            keywords = {concept.lower(): ('concept', concept) for concept in rules['required_concepts']}
+            keywords.update({age: ('age', age) for age in rules['key_ages']})
+            self._country_keywords[code] = keywords
+            self._country_automata[code] = _build_keyword_automaton(keywords)
+
+    def score(self, query: str, response: str, country: str = 'AU', response_lower: str = None, **kwargs) -> Dict[str, Any]:
         """Score country-specific compliance."""
 
-        rules = self.compliance_rules.get(country, self.compliance_rules['AU'])
-        response_lower = response.lower()
+        country_key = country if country in self.compliance_rules else 'AU'
+        rules = self.compliance_rules[country_key]
+        if response_lower is None:
+            response_lower = response.lower()
 
-        # Check for required concepts
-        concept_matches = sum(
-            1 for concept in rules['required_concepts']
-            if concept.lower() in response_lower
+        matched = _matched_keywords(
+            self._country_automata[country_key], self._country_keywords[country_key], response_lower
         )
+
+        # Check for required concepts
+        concept_matches = sum(1 for kind, _ in matched if kind == 'concept')
         concept_score = concept_matches / len(rules['required_concepts'])
 
         # Check for key ages (optional but good to have)
-        age_matches = sum(
-            1 for age in rules['key_ages']
-            if age in response_lower
-        )
+        age_matches = sum(1 for kind, _ in matched if kind == 'age')
         age_score = min(1.0, age_matches / len(rules['key_ages']))
 
         # Weighted score (concepts more important than specific ages)
@@ -291,33 +471,40 @@ class CitationQualityScorer:
     Validates that responses include proper citations when needed.
     """
 
+    __slots__ = ("name",)
+
+    # Citation forms as one alternation, compiled once and scanned in a single pass
+    _CITATION_RE = re.compile(
+        r'\[Source:.*?\]'
+        r'|\[.*?Act.*?\]'
+        r'|\[.*?Regulation.*?\]'
+        r'|according to'
+        r'|as per'
+        r'|under section',
+        re.IGNORECASE
+    )
+
+    # Query phrases that mark a factual/regulatory question (substring match)
+    FACTUAL_QUERY_KEYWORDS = ('how much', 'when', 'what is', 'can i', 'am i', 'tax', 'age', 'penalty')
+
     def __init__(self):
         self.name = "citation_quality"
-        self.citation_patterns = [
-            r'\[Source:.*?\]',
-            r'\[.*?Act.*?\]',
-            r'\[.*?Regulation.*?\]',
-            r'according to',
-            r'as per',
-            r'under section'
-        ]
 
-    def score(self, query: str, response: str, **kwargs) -> Dict[str, Any]:
+    def score(self, query: str, response: str, query_lower: str = None, **kwargs) -> Dict[str, Any]:
         """Score citation quality."""
 
-        # Count citations
-        citation_count = 0
-        for pattern in self.citation_patterns:
-            matches = re.findall(pattern, response, re.IGNORECASE)
-            citation_count += len(matches)
-
         # Check if query requires citations (looks factual/regulatory)
+        if query_lower is None:
+            query_lower = query.lower()
         requires_citations = any(
-            keyword in query.lower()
-            for keyword in ['how much', 'when', 'what is', 'can i', 'am i', 'tax', 'age', 'penalty']
+            keyword in query_lower
+            for keyword in self.FACTUAL_QUERY_KEYWORDS
         )
 
         if requires_citations:
+            # Count citations (only needed when they're expected)
+            citation_count = sum(1 for _ in self._CITATION_RE.finditer(response))
+
             # Score based on citation presence
             score = min(1.0, citation_count / 2)  # Expect at least 2 citations
             passed = citation_count >= 1
@@ -338,15 +525,49 @@ class CitationQualityScorer:
         }
 
 
-def get_all_scorers() -> List[Any]:
-    """Get all available scorers (built-in + custom)."""
-    return [
-        RelevanceScorer(),
-        FaithfulnessScorer(),
+@functools.lru_cache(maxsize=1)
+def get_all_scorers() -> tuple:
+    """
+    Get all available scorers (built-in + custom).
+
+    Built once per process and shared: scorers hold no per-query state, and the
+    keyword automata and workspace client are reused across score_query calls.
+    """
+    return (
+        CombinedJudgeScorer(),  # relevance + faithfulness in one judge call
         ToxicityScorer(),
         CountryComplianceScorer(),
         CitationQualityScorer()
-    ]
+    )
+
+
+def _scorer_names(scorer: Any) -> tuple:
+    """Names of the results a scorer produces (several for combined scorers)."""
+    return getattr(scorer, 'scorer_names', (scorer.name,))
+
+
+def _run_scorer(scorer: Any, **score_kwargs) -> Dict[str, Dict[str, Any]]:
+    """Run one scorer, returning its results keyed by scorer name (ERROR results on exception)."""
+    names = _scorer_names(scorer)
+    try:
+        result = scorer.score(**score_kwargs)
+        results = result if len(names) > 1 else {scorer.name: result}
+        for name, r in results.items():
+            logger.info(f"✅ {name}: {r['score']:.2f} ({r['verdict']})")
+        return results
+    except Exception as e:
+        logger.error(f"❌ {scorer.name} failed: {e}")
+        return {
+            name: {
+                'scorer': name,
+                'score': 0.0,
+                'passed': False,
+                'confidence': 0.0,
+                'reasoning': f'Scorer error: {str(e)}',
+                'verdict': 'ERROR'
+            }
+            for name in names
+        }
 
 
 def score_query(
@@ -375,35 +596,44 @@ def score_query(
 
     # Filter scorers if specified
     if scorers:
-        all_scorers = [s for s in all_scorers if s.name in scorers]
+        all_scorers = [s for s in all_scorers if any(name in scorers for name in _scorer_names(s))]
+
+    score_kwargs = dict(
+        query=query,
+        response=response,
+        country=country,
+        context=context,
+        tool_output=tool_output,
+        # Lowercased once here for every keyword-matching scorer
+        query_lower=query.lower(),
+        response_lower=response.lower()
+    )
 
+    # The LLM-judge scorers each block on an endpoint round-trip, so run all scorers
+    # concurrently: latency is the slowest scorer rather than the sum
     results = {}
-    for scorer in all_scorers:
-        try:
-            result = scorer.score(
-                query=query,
-                response=response,
-                country=country,
-                context=context,
-                tool_output=tool_output
-            )
-            results[scorer.name] = result
-            logger.info(f"✅ {scorer.name}: {result['score']:.2f} ({result['verdict']})")
-        except Exception as e:
-            logger.error(f"❌ {scorer.name} failed: {e}")
-            results[scorer.name] = {
-                'scorer': scorer.name,
-                'score': 0.0,
-                'passed': False,
-                'confidence': 0.0,
-                'reasoning': f'Scorer error: {str(e)}',
-                'verdict': 'ERROR'
-            }
+    if all_scorers:
+        with ThreadPoolExecutor(max_workers=len(all_scorers), thread_name_prefix="Scorer") as executor:
+            futures = [executor.submit(_run_scorer, scorer, **score_kwargs) for scorer in all_scorers]
+            for future in futures:
+                results.update(future.result())
 
-    # Calculate overall metrics
-    scores = [r['score'] for r in results.values() if r['score'] > 0]
-    avg_score = sum(scores) / len(scores) if scores else 0.0
-    passed_count = sum(1 for r in results.values() if r['passed'])
+    # A combined scorer may produce dimensions that weren't asked for
+    if scorers:
+        results = {name: r for name, r in results.items() if name in scorers}
+
+    # Calculate overall metrics in one pass. Failed scorers (verdict ERROR) carry a
+    # placeholder score, so they're left out of the average; genuine 0.0 scores count
+    score_sum = 0.0
+    score_n = 0
+    passed_count = 0
+    for r in results.values():
+        if r['verdict'] != 'ERROR':
+            score_sum += r['score']
+            score_n += 1
+        if r['passed']:
+            passed_count += 1
+    avg_score = score_sum / score_n if score_n else 0.0
     total_count = len(results)
 
     return {
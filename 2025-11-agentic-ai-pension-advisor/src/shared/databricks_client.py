@@ -0,0 +1,39 @@
+"""
+shared.databricks_client
+========================
+
+Process-wide Databricks WorkspaceClient.
+
+Constructing a WorkspaceClient resolves auth (profile/OAuth) and opens a new
+HTTP connection pool, so scripts and modules that issue several statements
+should share one client instead of creating their own.
+
+Usage:
+    >>> from src.shared.databricks_client import get_client
+    >>> w = get_client()
+    >>> w.statement_execution.execute_statement(statement="SELECT 1", warehouse_id=...)
+"""
+
+import functools
+
+from databricks.sdk import WorkspaceClient
+from databricks.sdk.core import Config
+
+# Sized for a handful of concurrent statements against one workspace host
+MAX_CONNECTION_POOLS = 8
+MAX_CONNECTIONS_PER_POOL = 16
+
+
+@functools.lru_cache(maxsize=1)
+def get_client() -> WorkspaceClient:
+    """
+    Get the shared WorkspaceClient, creating it on first use.
+
+    Auth is resolved from the environment as usual (DATABRICKS_CONFIG_PROFILE,
+    DATABRICKS_HOST/TOKEN, notebook context), so set those before the first call.
+    """
+    config = Config(
+        max_connection_pools=MAX_CONNECTION_POOLS,
+        max_connections_per_pool=MAX_CONNECTIONS_PER_POOL
+    )
+    return WorkspaceClient(config=config)
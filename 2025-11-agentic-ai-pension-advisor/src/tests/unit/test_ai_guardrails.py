@@ -0,0 +1,51 @@
+"""
+Unit tests for ai_guardrails PII detection and masking.
+
+Tests cover:
+- Checksum-validated card numbers
+- Aadhaar numbers, and 16-digit numbers not being read as Aadhaar
+"""
+
+import pytest
+
+from src.ai_guardrails import SafetyGuardrails
+
+
+@pytest.fixture
+def guardrails():
+    return SafetyGuardrails()
+
+
+class TestCardNumberMasking:
+    """Test suite for card numbers and the Aadhaar pattern inside them."""
+
+    def test_valid_card_is_masked(self, guardrails):
+        """Test a Luhn-valid card number is masked as a whole."""
+        masked, found = guardrails._mask_and_detect_pii("card 4111 1111 1111 1111")
+        assert masked == "card [REDACTED]"
+        assert found == ['credit_card']
+
+    @pytest.mark.parametrize("text", [
+        "card 4111 1111 1111 1112",
+        "card 4111111111111112",
+    ])
+    def test_luhn_invalid_card_is_not_read_as_aadhaar(self, guardrails, text):
+        """Test spaced and unspaced Luhn-invalid numbers are handled alike, not as Aadhaar."""
+        masked, found = guardrails._mask_and_detect_pii(text)
+        assert masked == text
+        assert found == []
+        assert 'in_aadhaar' not in guardrails._detect_pii(text)
+
+
+class TestAadhaarMasking:
+    """Test suite for standalone Aadhaar numbers."""
+
+    @pytest.mark.parametrize("text", [
+        "aadhaar 2345 6789 0123",
+        "aadhaar 234567890123",
+    ])
+    def test_aadhaar_is_masked(self, guardrails, text):
+        """Test a standalone 12-digit Aadhaar number is masked and reported."""
+        masked, found = guardrails._mask_and_detect_pii(text)
+        assert masked == "aadhaar [REDACTED]"
+        assert 'in_aadhaar' in found
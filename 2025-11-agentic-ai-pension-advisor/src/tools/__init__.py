@@ -49,10 +49,24 @@ except Exception as e:
 try:
     _tools_module_path = Path(__file__).parent.parent / 'tools.py'
     if _tools_module_path.exists():
-        _spec = importlib.util.spec_from_file_location("_root_tools", _tools_module_path)
-        if _spec and _spec.loader:
-            _root_tools = importlib.util.module_from_spec(_spec)
-            _spec.loader.exec_module(_root_tools)
+        # Reuse the module from an earlier load of this package (e.g. a notebook reload)
+        # unless tools.py has changed since, instead of executing the file again
+        _tools_mtime = _tools_module_path.stat().st_mtime
+        _root_tools = sys.modules.get("_root_tools")
+        if _root_tools is not None and getattr(_root_tools, "_source_mtime", None) != _tools_mtime:
+            _root_tools = None
+        if _root_tools is None:
+            _spec = importlib.util.spec_from_file_location("_root_tools", _tools_module_path)
+            if _spec and _spec.loader:
+                _root_tools = importlib.util.module_from_spec(_spec)
+                sys.modules["_root_tools"] = _root_tools
+                try:
+                    _spec.loader.exec_module(_root_tools)
+                except Exception:
+                    sys.modules.pop("_root_tools", None)
+                    raise
+                _root_tools._source_mtime = _tools_mtime
+        if _root_tools is not None:
             SuperAdvisorTools = _root_tools.SuperAdvisorTools
             call_individual_tool = _root_tools.call_individual_tool
             # Alias for notebooks
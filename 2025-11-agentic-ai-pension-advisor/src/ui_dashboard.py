@@ -20,7 +20,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from typing import Dict, List
-from src.utils.lakehouse import execute_sql_query
+from src.utils.lakehouse import execute_sql_query, execute_sql_query_arrow
 from src.config import UNITY_CATALOG, UNITY_SCHEMA
 
 
@@ -62,7 +62,8 @@ def get_dashboard_data() -> pd.DataFrame:
         ORDER BY CAST(timestamp AS TIMESTAMP) DESC
         LIMIT 1000
         """
-        return execute_sql_query(query)
+        # Up to 1000 rows with full query text: fetch as Arrow rather than JSON
+        return execute_sql_query_arrow(query)
     except Exception as e:
         st.error(f"Error loading dashboard data: SQL execution error: {e}")
         import traceback
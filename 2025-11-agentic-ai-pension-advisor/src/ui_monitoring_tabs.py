@@ -815,12 +815,17 @@ def render_automated_scoring_tab():
         # === SCORER BREAKDOWN ===
         st.markdown("#### 🎯 Individual Scorer Performance")
 
-        # Parse individual scores from JSON
+        # individual_scores is a MAP<STRING, STRUCT<score, passed>> column:
+        # Spark returns a dict of Rows, the SQL warehouse returns it as a JSON string
         scorer_results = []
         for idx, row in scoring_data.iterrows():
             try:
-                individual = json.loads(row['individual_scores'])
-                for scorer_name, scorer_data in individual.items():
+                individual = row['individual_scores']
+                if isinstance(individual, str):
+                    individual = json.loads(individual)
+                for scorer_name, scorer_data in (individual or {}).items():
+                    if hasattr(scorer_data, 'asDict'):
+                        scorer_data = scorer_data.asDict()
                     if isinstance(scorer_data, dict):
                         scorer_results.append({
                             'scorer': scorer_name,
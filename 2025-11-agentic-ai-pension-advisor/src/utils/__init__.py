@@ -17,6 +17,7 @@ Usage:
 # Lakehouse operations
 from src.utils.lakehouse import (
     execute_sql_query,
+    execute_sql_query_arrow,
     execute_sql_statement,
     get_member_by_id,
     get_members_by_country,
@@ -46,6 +47,7 @@ from src.utils.audit import (
 __all__ = [
     # Lakehouse
     'execute_sql_query',
+    'execute_sql_query_arrow',
     'execute_sql_statement',
     'get_member_by_id',
     'get_members_by_country',
@@ -12,24 +12,22 @@ Eliminates duplicate execute_query() functions!
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+import requests
 import time
 from typing import Optional, List, Dict
 from databricks.sdk import WorkspaceClient
-from databricks.sdk.service.sql import StatementState
+from databricks.sdk.service.sql import Disposition, Format, StatementState
 from src.config import UNITY_CATALOG, UNITY_SCHEMA
+from src.shared.databricks_client import get_client
 from src.shared.logging_config import get_logger
 
 logger = get_logger(__name__)
 
-# Single WorkspaceClient instance
-_workspace_client = None
-
 def get_workspace_client() -> WorkspaceClient:
-    """Get or create WorkspaceClient singleton."""
-    global _workspace_client
-    if _workspace_client is None:
-        _workspace_client = WorkspaceClient()
-    return _workspace_client
+    """Get the process-wide WorkspaceClient singleton."""
+    return get_client()
 
 
 # ============================================================================
@@ -96,6 +94,76 @@ def execute_sql_query(query: str, warehouse_id: Optional[str] = None) -> pd.Data
         raise Exception(f"SQL execution error: {str(e)}")
 
 
+def execute_sql_query_arrow(query: str, warehouse_id: Optional[str] = None) -> pd.DataFrame:
+    """
+    Execute SQL query and return a typed DataFrame via Arrow result chunks.
+
+    Unlike execute_sql_query (JSON data_array, every cell a string), results are
+    fetched as EXTERNAL_LINKS + ARROW_STREAM, so the warehouse skips JSON encoding,
+    columns keep their SQL types, and results spanning several chunks are read in full.
+    Prefer it for large result sets such as governance dumps.
+
+    Args:
+        query: SQL query string
+        warehouse_id: Optional warehouse ID (uses config default if not provided)
+
+    Returns:
+        pandas DataFrame with results
+
+    Raises:
+        ValueError: If warehouse_id is not configured
+        Exception: For SQL execution errors
+    """
+    from src.config import SQL_WAREHOUSE_ID
+
+    wh_id = warehouse_id or SQL_WAREHOUSE_ID
+
+    if not wh_id or wh_id in ["YOUR_WAREHOUSE_ID_HERE", "<Your SQL Warehouse ID>", "None", "", "null"]:
+        raise ValueError("SQL Warehouse ID not configured. Please set it in Configuration.")
+
+    w = get_workspace_client()
+
+    try:
+        statement = w.statement_execution.execute_statement(
+            warehouse_id=wh_id,
+            statement=query,
+            disposition=Disposition.EXTERNAL_LINKS,
+            format=Format.ARROW_STREAM,
+            wait_timeout="30s"
+        )
+
+        while statement.status.state in [StatementState.PENDING, StatementState.RUNNING]:
+            time.sleep(0.5)
+            statement = w.statement_execution.get_statement(statement.statement_id)
+
+        if statement.status.state != StatementState.SUCCEEDED:
+            error_msg = f"Query failed with state: {statement.status.state}"
+            if statement.status.error:
+                error_msg += f"\nError: {statement.status.error.message}"
+            raise Exception(error_msg)
+
+        batches = []
+        chunk = statement.result
+        while chunk and chunk.external_links:
+            for link in chunk.external_links:
+                # Presigned cloud storage URL: must be fetched without Databricks auth headers
+                response = requests.get(link.external_link, timeout=60)
+                response.raise_for_status()
+                batches.extend(pa.ipc.open_stream(response.content).read_all().to_batches())
+            next_index = chunk.external_links[-1].next_chunk_index
+            chunk = (
+                w.statement_execution.get_statement_result_chunk_n(statement.statement_id, next_index)
+                if next_index is not None else None
+            )
+
+        if not batches:
+            return pd.DataFrame()
+        return pa.Table.from_batches(batches).to_pandas()
+
+    except Exception as e:
+        raise Exception(f"SQL execution error: {str(e)}")
+
+
 def execute_sql_statement(query: str, warehouse_id: Optional[str] = None):
     """
     Execute SQL statement and return raw statement result.
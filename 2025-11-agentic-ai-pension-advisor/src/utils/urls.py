@@ -6,16 +6,30 @@ Provides functions to generate links to Databricks workspaces, MLflow, Unity Cat
 
 import os
 from typing import Optional
+from urllib.parse import quote
+
+
+# Resolved workspace URL; only successful lookups are kept, so a transient failure is retried
+_workspace_url: Optional[str] = None
 
 
 def get_workspace_url() -> Optional[str]:
     """
     Get the Databricks workspace URL from environment or WorkspaceClient.
 
+    Cached once found; every link helper below builds on it.
+
     Returns:
         Workspace URL (e.g., "https://adb-1234567890123456.7.azuredatabricks.net")
         or None if not available
     """
+    global _workspace_url
+    if _workspace_url is None:
+        _workspace_url = _resolve_workspace_url()
+    return _workspace_url
+
+
+def _resolve_workspace_url() -> Optional[str]:
     # Try multiple environment variables first
     workspace_url = (
         os.environ.get("DATABRICKS_HOST") or
@@ -27,10 +41,10 @@ def get_workspace_url() -> Optional[str]:
         # Remove trailing slash
         return workspace_url.rstrip("/")
 
-    # If no env vars, try WorkspaceClient (will use .databrickscfg)
+    # If no env vars, try the shared WorkspaceClient (will use .databrickscfg)
     try:
-        from databricks.sdk import WorkspaceClient
-        w = WorkspaceClient()
+        from src.shared.databricks_client import get_client
+        w = get_client()
         if hasattr(w.config, 'host') and w.config.host:
             return w.config.host.rstrip("/")
     except Exception:
@@ -54,7 +68,6 @@ def get_mlflow_experiment_url(experiment_path: str) -> Optional[str]:
         return None
 
     # URL encode the experiment path
-    from urllib.parse import quote
     encoded_path = quote(experiment_path, safe="")
 
     return f"{workspace_url}/ml/experiments?searchFilter=name%3D%22{encoded_path}%22"